@@ -1,150 +1,118 @@
-import sqlite3
+import json
 import os
-from collections import defaultdict
-import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse
 
 # Database path - Vercel serverless functions need absolute path
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE = os.path.join(BASE_DIR, 'uic_courses.db')
-
-def get_db_connection():
-    """Get database connection with row factory"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def parse_credits(credits_str):
-    """Parse credits string and extract numeric value"""
-    if not credits_str:
-        return 3
-    match = re.search(r'(\d+)', credits_str)
-    return int(match.group(1)) if match else 3
-
-def estimate_difficulty(level):
-    """Estimate difficulty based on course level"""
-    if level <= 200:
-        return "Light"
-    elif level <= 300:
-        return "Moderate"
+# DATABASE_PATH points the handlers at another catalog (e.g. a benchmark database)
+DATABASE = os.environ.get('DATABASE_PATH', os.path.join(BASE_DIR, 'uic_courses.db'))
+
+# The catalog and endpoint code is shared with the Flask backend
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'backend'))
+
+import sql_trace
+from catalog_service import CatalogService, ServiceError
+from db import ReadOnlyConnections, serving_path
+from request_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics
+from response_cache import (PreparedResponse, write_error_response, write_json_response,
+                            write_prepared_response, write_streamed_response)
+
+# Search and grade queries run on one persistent connection per thread, kept
+# across the invocations of a warm container. The deployed file never changes,
+# so it is opened read-only and immutable with the serving PRAGMAs applied once.
+# DATABASE_COPY=auto (default), always or never: whether to serve a copy under
+# /tmp instead, for when reading from the deployment bundle is slow.
+connections = ReadOnlyConnections(serving_path(DATABASE, os.environ.get('DATABASE_COPY', 'auto')),
+                                  immutable=True)
+
+# Endpoint logic and response caches, shared with the Flask backend; a warm
+# container keeps them between requests. The catalog is read from the same
+# file and in the same mode as the queries.
+service = CatalogService(DATABASE, uri=connections.uri)
+
+# Load the catalog while the container starts, from the prebuilt snapshot
+# (uic_courses.snapshot, see catalog_snapshot.py) when it is current
+service.catalog()
+
+def write_result(handler, result, headers=()):
+    """Send a CatalogService result from a BaseHTTPRequestHandler"""
+    if isinstance(result, PreparedResponse):
+        write_prepared_response(handler, result)
+    elif isinstance(result, bytes):
+        write_json_response(handler, result, headers=headers)
     else:
-        return "Challenging"
-
-def format_prerequisites_from_list(prereq_list):
-    """
-    Format prerequisites from a list of dicts with 'code' and 'group' keys.
-    Returns: {
-        'groups': [[course1, course2], [course3], ...],
-        'formatted': 'string representation'
-    }
-    """
-    if not prereq_list:
-        return {'groups': [], 'formatted': 'None'}
-
-    groups_dict = defaultdict(list)
-    for prereq in prereq_list:
-        groups_dict[prereq['group']].append(prereq['code'])
-
-    groups = [groups_dict[gid] for gid in sorted(groups_dict.keys())]
-
-    formatted_parts = []
-    for group in groups:
-        if len(group) == 1:
-            formatted_parts.append(group[0])
-        else:
-            formatted_parts.append('(' + ' or '.join(group) + ')')
-
-    formatted = ' and '.join(formatted_parts) if formatted_parts else 'None'
-
-    return {
-        'groups': groups,
-        'formatted': formatted
-    }
-
-def get_prerequisites_grouped(course_id):
-    """
-    Get prerequisites grouped by group_id.
-    Returns: {
-        'groups': [[course1, course2], [course3], ...],
-        'formatted': 'string representation'
-    }
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT prerequisite_code, group_id
-        FROM prerequisites
-        WHERE course_id = ?
-        ORDER BY group_id, prerequisite_code
-    ''', (course_id,))
-
-    prereq_rows = cursor.fetchall()
-    conn.close()
+        write_streamed_response(handler, result)
+
+def read_json_body(handler):
+    """The request body parsed as JSON, or None if it is missing or not JSON"""
+    length = int(handler.headers.get('Content-Length') or 0)
+    try:
+        return json.loads(handler.rfile.read(length).decode('utf-8')) if length else None
+    except ValueError:
+        return None
 
-    if not prereq_rows:
-        return {'groups': [], 'formatted': 'None'}
+# Request metrics for this instance (GET /api/_metrics)
+metrics = Metrics()
+service.register_caches(metrics)
 
-    groups_dict = defaultdict(list)
-    for row in prereq_rows:
-        groups_dict[row['group_id']].append(row['prerequisite_code'])
+def get_db_connection():
+    """This thread's persistent read-only connection. Don't close it."""
+    return connections.get()
 
-    groups = [groups_dict[gid] for gid in sorted(groups_dict.keys())]
+class _CountingWriter:
+    """Wraps a handler's wfile to count the body bytes written after the headers"""
 
-    formatted_parts = []
-    for group in groups:
-        if len(group) == 1:
-            formatted_parts.append(group[0])
-        else:
-            formatted_parts.append('(' + ' or '.join(group) + ')')
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self.written = 0
 
-    formatted = ' and '.join(formatted_parts) if formatted_parts else 'None'
+    def write(self, data):
+        self.written += len(data)
+        return self._wfile.write(data)
 
-    return {
-        'groups': groups,
-        'formatted': formatted
-    }
+    def __getattr__(self, name):
+        return getattr(self._wfile, name)
 
-def get_difficulty_from_grades(course_code):
+class MeasuredHandler(BaseHTTPRequestHandler):
     """
-    Calculate difficulty based on grade distribution data.
-    Returns difficulty string or None if no data available.
+    Base class for the handlers: records each request's latency, status, SQL
+    statement count and body size in `metrics`. Handlers whose path carries a
+    parameter set `route` so all of their requests share one series.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT
-            SUM(gd.grade_a) as total_a,
-            SUM(gd.grade_b) as total_b,
-            SUM(gd.grade_c) as total_c,
-            SUM(gd.grade_d) as total_d,
-            SUM(gd.grade_f) as total_f
-        FROM grade_distributions gd
-        WHERE gd.course_code = ?
-    ''', (course_code,))
-
-    result = cursor.fetchone()
-    conn.close()
-
-    if not result or result['total_a'] is None:
-        return None
 
-    total_a = result['total_a'] or 0
-    total_b = result['total_b'] or 0
-    total_c = result['total_c'] or 0
-    total_d = result['total_d'] or 0
-    total_f = result['total_f'] or 0
-
-    total_letter_grades = total_a + total_b + total_c + total_d + total_f
-
-    if total_letter_grades == 0:
-        return None
-
-    ab_percentage = ((total_a + total_b) / total_letter_grades) * 100
-
-    if ab_percentage >= 70:
-        return "Light"
-    elif ab_percentage >= 50:
-        return "Moderate"
-    else:
-        return "Challenging"
+    route = None
+
+    def setup(self):
+        super().setup()
+        self.wfile = _CountingWriter(self.wfile)
+
+    def handle_one_request(self):
+        self._status = None
+        self._started = time.perf_counter()
+        connections.start_request()
+        sql_trace.start_request()
+        super().handle_one_request()
+
+        # A request line that fails to parse gets an error response but has no path
+        if self._status is not None and self.command is not None:
+            route = self.route or urlparse(self.path).path
+            metrics.observe(self.command, route, self._status,
+                            time.perf_counter() - self._started, connections.query_count(),
+                            self.wfile.written)
+            sql_trace.finish_request(self.command, route)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        # SQL_TRACE=debug: the statements run so far (everything, unless the body is streamed)
+        if sql_trace.DEBUG_HEADERS:
+            for name, value in sql_trace.debug_headers():
+                self.send_header(name, value)
+        super().end_headers()
+        # Headers are flushed through wfile; only what follows is body
+        self.wfile.written = 0
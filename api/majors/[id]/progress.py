@@ -0,0 +1,35 @@
+import sys
+import os
+import re
+
+# Add parent directory to path to access _db module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from _db import MeasuredHandler, ServiceError, read_json_body, service, write_error_response, write_result
+
+class handler(MeasuredHandler):
+    route = '/api/majors/[id]/progress'
+
+    def do_POST(self):
+        try:
+            # Extract major_id from URL path
+            # Path will be like /api/majors/2/progress
+            match = re.search(r'/majors/(\d+)/progress', self.path)
+            if not match:
+                write_error_response(self, 400, 'Invalid URL format')
+                return
+
+            write_result(self, service.major_progress(int(match.group(1)), read_json_body(self)))
+        except ServiceError as e:
+            write_error_response(self, e.status, str(e))
+        except Exception as e:
+            write_error_response(self, 500, str(e))
+
+    def do_OPTIONS(self):
+        # Handle CORS preflight
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        return
@@ -0,0 +1,24 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _db import MeasuredHandler, METRICS_CONTENT_TYPE, metrics, write_error_response
+
+# Served at /api/_metrics through the rewrite in vercel.json (files starting with
+# an underscore aren't deployed as functions). Reports this instance only.
+class handler(MeasuredHandler):
+    route = '/api/_metrics'
+
+    def do_GET(self):
+        try:
+            body = metrics.render()
+            self.send_response(200)
+            self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+        except Exception as e:
+            write_error_response(self, 500, str(e))
@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _db import MeasuredHandler, ServiceError, read_json_body, service, write_error_response, write_result
+
+class handler(MeasuredHandler):
+    def do_POST(self):
+        try:
+            write_result(self, service.plan(read_json_body(self)))
+        except ServiceError as e:
+            write_error_response(self, e.status, str(e))
+        except Exception as e:
+            write_error_response(self, 500, str(e))
+
+    def do_OPTIONS(self):
+        # Handle CORS preflight
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        return
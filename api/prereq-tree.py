@@ -0,0 +1,23 @@
+import sys
+import os
+from urllib.parse import urlparse, parse_qs
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _db import MeasuredHandler, ServiceError, service, write_error_response, write_result
+
+class handler(MeasuredHandler):
+    def do_GET(self):
+        try:
+            # Parse course_code from query parameters
+            params = parse_qs(urlparse(self.path).query)
+            if 'code' not in params:
+                write_error_response(self, 400, 'Missing course code parameter')
+                return
+
+            write_result(self, service.prerequisite_tree(params['code'][0]))
+        except ServiceError as e:
+            write_error_response(self, e.status, str(e))
+        except Exception as e:
+            write_error_response(self, 500, str(e))
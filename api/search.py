@@ -0,0 +1,21 @@
+import sys
+import os
+from urllib.parse import urlparse, parse_qs
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _db import MeasuredHandler, ServiceError, get_db_connection, service, write_error_response, write_result
+
+class handler(MeasuredHandler):
+    def do_GET(self):
+        try:
+            # Parse search text from query parameters
+            params = parse_qs(urlparse(self.path).query)
+            # Persistent per-thread connection - don't close it
+            write_result(self, service.search(get_db_connection(), params.get('q', [''])[0],
+                                              params.get('limit', [None])[0]))
+        except ServiceError as e:
+            write_error_response(self, e.status, str(e))
+        except Exception as e:
+            write_error_response(self, 500, str(e))
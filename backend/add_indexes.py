@@ -5,9 +5,9 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATABASE = os.path.join(BASE_DIR, 'uic_courses.db')
 
-def add_indexes():
+def add_indexes(database=DATABASE):
     """Add indexes to improve query performance"""
-    conn = sqlite3.connect(DATABASE)
+    conn = sqlite3.connect(database)
     cursor = conn.cursor()
 
     print("Adding database indexes...")
@@ -19,6 +19,13 @@ def add_indexes():
     ''')
     print("Created index on courses.course_code")
 
+    # Index for the catalog load's ORDER BY course_number
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_courses_number
+        ON courses(course_number)
+    ''')
+    print("Created index on courses.course_number")
+
     # Index for prerequisite lookups
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_prerequisites_course_id
@@ -0,0 +1,299 @@
+# ASGI entry point for the backend: `uvicorn asgi:app --port 5001`.
+# Serves the same Flask routes as api.py. Each request runs on a bounded thread
+# pool, so SQLite connections (one per pool thread) and CPU work stay bounded.
+# The compute-heavy POST endpoints get their own small pool: a burst of eligibility,
+# planner or progress calls queues there instead of in front of /api/majors, and
+# once a pool's queue is full new requests are turned away with a 503.
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from api import app as flask_app, metrics
+from response_cache import encode_json
+
+# Threads per pool, and how many requests a pool accepts (running + queued)
+# before answering 503 with Retry-After
+LIGHT_WORKERS = 8
+LIGHT_MAX_PENDING = 256
+HEAVY_WORKERS = 2
+HEAVY_MAX_PENDING = 32
+
+RETRY_AFTER_SECONDS = 1
+
+# Largest request body read into memory
+MAX_BODY_BYTES = 1024 * 1024
+
+# Chunks of a streamed response produced ahead of what the client has taken
+STREAM_QUEUE_CHUNKS = 8
+
+
+class RequestBodyTooLarge(Exception):
+    pass
+
+
+class WorkerPool:
+    """
+    Thread pool that admits at most `max_pending` requests at a time. `pending`
+    is only touched from the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, name, workers, max_pending):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'asgi-{name}')
+
+    def try_acquire(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return False
+        self.pending += 1
+        return True
+
+    def release(self):
+        self.pending -= 1
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'maxPending': self.max_pending,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+light_pool = WorkerPool('light', LIGHT_WORKERS, LIGHT_MAX_PENDING)
+heavy_pool = WorkerPool('heavy', HEAVY_WORKERS, HEAVY_MAX_PENDING)
+
+# Pending and rejected counts show up on /api/_metrics
+metrics.register_pool(light_pool.name, light_pool.stats)
+metrics.register_pool(heavy_pool.name, heavy_pool.stats)
+
+def pool_for(method, path):
+    """Eligibility, planning and progress audits are heavy; everything else is light"""
+    if method == 'POST' and path != '/api/courses':
+        return heavy_pool
+    return light_pool
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'content-length':
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+class _ResponseStream:
+    """
+    Carries a streamed response from the pool thread producing it to the event
+    loop. `started` resolves to (status, headers); the body then arrives through
+    get() as chunks ending with None, at most STREAM_QUEUE_CHUNKS ahead of the
+    sender.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._queue = asyncio.Queue(STREAM_QUEUE_CHUNKS)
+        self._abandoned = False
+        self.started = loop.create_future()
+
+    def start(self, status, headers):
+        self._loop.call_soon_threadsafe(self._set_started, (status, headers))
+
+    def _set_started(self, started):
+        if not self.started.done():
+            self.started.set_result(started)
+
+    def put(self, chunk):
+        # From the pool thread: waits while the queue is full. False once the
+        # sender has given up, so the producer can stop early.
+        if self._abandoned:
+            return False
+        asyncio.run_coroutine_threadsafe(self._queue.put(chunk), self._loop).result()
+        return not self._abandoned
+
+    async def get(self):
+        return await self._queue.get()
+
+    def abandon(self):
+        # On the event loop: unblock a producer waiting on a full queue
+        self._abandoned = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+def _run_wsgi(environ, stream):
+    # Runs on a pool thread from start to finish. A response with a
+    # Content-Length is read and closed here in one go and returned as
+    # (status, headers, body), so it costs a single hop to the pool. A streamed
+    # one is handed to `stream` and None is returned: its generator (and the
+    # per-thread SQLite cursor it reads from) never leaves this thread.
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        chunks = iter(result)
+        # start_response may legally be deferred until the first chunk
+        first = next(chunks, b'')
+        if any(name.lower() == 'content-length' for name, _ in started['headers']):
+            return started['status'], started['headers'], first + b''.join(chunks)
+
+        stream.start(started['status'], started['headers'])
+        try:
+            if stream.put(first):
+                for chunk in chunks:
+                    if not stream.put(chunk):
+                        break
+        finally:
+            stream.put(None)
+        return None
+    finally:
+        _close_wsgi(result)
+
+def _close_wsgi(result):
+    close = getattr(result, 'close', None)
+    if close is not None:
+        close()
+
+
+async def _read_body(receive):
+    # The whole request body, or None if the client went away first
+    body = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestBodyTooLarge()
+        body.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(body)
+
+async def _send_json(send, status, payload, headers=()):
+    body = encode_json(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode('latin-1')),
+                    (b'access-control-allow-origin', b'*'),
+                    *headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def _response_start(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    }
+
+async def _serve_http(scope, receive, send):
+    pool = pool_for(scope['method'], scope['path'])
+    if not pool.try_acquire():
+        await _send_json(send, 503, {'error': 'Server busy, retry shortly'},
+                         [(b'retry-after', str(RETRY_AFTER_SECONDS).encode('latin-1'))])
+        return
+
+    try:
+        try:
+            body = await _read_body(receive)
+        except RequestBodyTooLarge:
+            await _send_json(send, 413, {'error': 'Request body too large'})
+            return
+        if body is None:
+            return
+
+        stream = _ResponseStream(asyncio.get_running_loop())
+        task = asyncio.ensure_future(pool.run(_run_wsgi, _wsgi_environ(scope, body), stream))
+        try:
+            await asyncio.wait((task, stream.started), return_when=asyncio.FIRST_COMPLETED)
+            if not stream.started.done():
+                status, headers, body = await task
+                await send(_response_start(status, headers))
+                await send({'type': 'http.response.body', 'body': body})
+                return
+
+            # A streamed response keeps its pool thread until the last chunk is sent
+            await send(_response_start(*stream.started.result()))
+            while True:
+                chunk = await stream.get()
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await task
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            # If sending failed, let the producer finish (and close the response)
+            # before its pool slot is given back
+            stream.abandon()
+            await asyncio.wait((task,))
+    finally:
+        pool.release()
+
+async def _serve_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            light_pool.shutdown()
+            heavy_pool.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'http':
+        await _serve_http(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await _serve_lifespan(receive, send)
+    else:
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get("PORT", 5001))
+    uvicorn.run(app, host='0.0.0.0', port=port)
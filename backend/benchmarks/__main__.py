@@ -0,0 +1,79 @@
+# Command line for the benchmark suite, run from backend/:
+#
+#   python -m benchmarks generate /tmp/bench-20k.db --scale medium
+#   python -m benchmarks generate /tmp/bench.db --courses 5000 --sections 12
+#   python -m benchmarks run /tmp/bench-20k.db --save baseline.json
+#   python -m benchmarks run /tmp/bench-20k.db --compare baseline.json
+#
+# `run --compare` exits with status 1 if any case regressed against the baseline.
+import argparse
+import sys
+
+from benchmarks import baseline, runner, synthetic
+
+def generate_command(args):
+    scale = dict(synthetic.SCALES[args.scale])
+    if args.courses:
+        scale['courses'] = args.courses
+    if args.sections:
+        scale['sections_per_course'] = args.sections
+    counts = synthetic.generate(args.out, majors=args.majors, seed=args.seed, **scale)
+    print(f"Wrote {args.out}: " + ', '.join(f'{key} {value}' for key, value in counts.items()))
+    return 0
+
+def run_command(args):
+    def progress(name, result):
+        print(runner.format_result(name, result), flush=True)
+
+    results = runner.run(args.db, iterations=args.iterations, only=args.only, progress=progress)
+    counts = results['meta']['counts']
+    print(f"\n{counts['courses']} courses, {counts['prerequisites']} prerequisites, "
+          f"{counts['grade_distributions']} grade rows; {args.iterations} requests per case")
+    if results['meta']['unbenchmarked']:
+        print('Not benchmarked: ' + ', '.join(results['meta']['unbenchmarked']))
+
+    if args.save:
+        baseline.save(results, args.save)
+        print(f"Saved {args.save}")
+
+    if args.compare:
+        lines, regressions = baseline.compare(baseline.load(args.compare), results, args.threshold)
+        print(f"\nAgainst {args.compare}:")
+        for line in lines:
+            print(line)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):")
+            for name, reason in regressions:
+                print(f"  {name}: {reason}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='write a synthetic catalog database')
+    generate.add_argument('out')
+    generate.add_argument('--scale', choices=sorted(synthetic.SCALES), default='small')
+    generate.add_argument('--courses', type=int, help='override the number of courses')
+    generate.add_argument('--sections', type=int, help='override the average grade rows per graded course')
+    generate.add_argument('--majors', type=int)
+    generate.add_argument('--seed', type=int, default=1)
+    generate.set_defaults(handler=generate_command)
+
+    run = commands.add_parser('run', help='benchmark every route and handler against a database')
+    run.add_argument('db')
+    run.add_argument('--iterations', type=int, default=runner.DEFAULT_ITERATIONS)
+    run.add_argument('--only', help='only cases whose name contains this text')
+    run.add_argument('--save', help='write the results to this JSON file')
+    run.add_argument('--compare', help='baseline JSON file to compare against')
+    run.add_argument('--threshold', type=float, default=baseline.DEFAULT_THRESHOLD,
+                     help='allowed fractional growth in p95 latency and peak memory (default 0.25)')
+    run.set_defaults(handler=run_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
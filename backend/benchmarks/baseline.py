@@ -0,0 +1,61 @@
+# Saved benchmark runs and the comparison of a new run against one. A case
+# regresses when its p95 latency grows by more than the threshold (and by more
+# than NOISE_FLOOR_MS, so sub-millisecond jitter is ignored), when it runs more
+# SQL statements, or when its peak memory grows by more than the threshold.
+import json
+
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR_MS = 1.0
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _change(old, new):
+    if not old:
+        return ''
+    return f'{(new - old) / old * 100:+.0f}%'
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Lines describing every case present in both runs, and the list of
+    regressions as (case name, reason) pairs.
+    """
+    lines = []
+    regressions = []
+    old_cases = baseline['cases']
+    new_cases = current['cases']
+
+    for name in sorted(set(old_cases) | set(new_cases)):
+        old = old_cases.get(name)
+        new = new_cases.get(name)
+        if old is None or new is None:
+            lines.append(f"{name:52} {'new case' if old is None else 'not run'}")
+            continue
+
+        reasons = []
+        if (new['p95_ms'] > old['p95_ms'] * (1 + threshold) and
+                new['p95_ms'] - old['p95_ms'] > NOISE_FLOOR_MS):
+            reasons.append(f"p95 {old['p95_ms']:.3f} -> {new['p95_ms']:.3f} ms")
+        if old['sql'] is not None and new['sql'] is not None and new['sql'] > old['sql']:
+            reasons.append(f"sql {old['sql']} -> {new['sql']}")
+        if new['peak_kb'] > old['peak_kb'] * (1 + threshold) and new['peak_kb'] - old['peak_kb'] > 64:
+            reasons.append(f"peak {old['peak_kb']:.1f} -> {new['peak_kb']:.1f} KB")
+        for reason in reasons:
+            regressions.append((name, reason))
+
+        lines.append(f"{name:52} p50 {old['p50_ms']:9.3f} -> {new['p50_ms']:9.3f} {_change(old['p50_ms'], new['p50_ms']):>6}"
+                     f"  p95 {old['p95_ms']:9.3f} -> {new['p95_ms']:9.3f} {_change(old['p95_ms'], new['p95_ms']):>6}"
+                     f"  sql {old['sql'] if old['sql'] is not None else '-'} -> "
+                     f"{new['sql'] if new['sql'] is not None else '-'}"
+                     f"{'  REGRESSION' if reasons else ''}")
+
+    if baseline['meta'].get('counts') != current['meta'].get('counts'):
+        lines.append(f"warning: catalogs differ ({baseline['meta'].get('counts')} vs "
+                     f"{current['meta'].get('counts')}); results are not directly comparable")
+    return lines, regressions
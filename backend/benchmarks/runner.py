@@ -0,0 +1,354 @@
+# In-process benchmarks of every Flask route in api.py and every Vercel handler
+# in api/, against one catalog database. Flask routes go through the test client;
+# handlers are fed a raw HTTP request over a fake socket, so both run their full
+# request path (metrics, SQL counting, caches) without a server or network.
+#
+# For each case: latency percentiles over `iterations` timed requests (after
+# warm-up requests that fill the caches, as in a warm worker), the SQL statements
+# run by one request and the peak Python memory allocated while serving it.
+import glob
+import importlib.util
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VERCEL_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'api')
+
+DEFAULT_ITERATIONS = 50
+WARMUP_ITERATIONS = 3
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# Requests whose body changes on every iteration, so a result cache never answers them
+COLD = 'cold'
+
+
+class Case:
+    """
+    One benchmarked request. `body` is a JSON-able payload, or a function of the
+    iteration number returning one (for requests that must miss the caches).
+    """
+
+    def __init__(self, name, method, path, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+
+    def encoded_body(self, iteration):
+        body = self.body(iteration) if callable(self.body) else self.body
+        return b'' if body is None else json.dumps(body).encode('utf-8')
+
+
+def sample_inputs(database):
+    """Course codes, a major and completed sets picked from the catalog being benchmarked"""
+    conn = sqlite3.connect(database)
+    cursor = conn.cursor()
+
+    def first(sql):
+        row = cursor.execute(sql).fetchone()
+        return row[0] if row else None
+
+    inputs = {
+        # The most depended-on course: the largest unlocks fan-in
+        'popular': first('SELECT prerequisite_code FROM prerequisites GROUP BY prerequisite_code '
+                         'ORDER BY COUNT(*) DESC, prerequisite_code LIMIT 1'),
+        # An upper-level course with prerequisites: a deep prerequisite tree
+        'advanced': first('SELECT c.course_code FROM courses c JOIN prerequisites p ON p.course_id = c.id '
+                          'ORDER BY c.level DESC, c.course_code LIMIT 1'),
+        'graded': first('SELECT course_code FROM grade_distributions GROUP BY course_code '
+                        'ORDER BY COUNT(*) DESC, course_code LIMIT 1'),
+        'major': first('SELECT id FROM majors ORDER BY id LIMIT 1'),
+        'department': first("SELECT substr(course_code, 1, instr(course_code, ' ') - 1) FROM courses "
+                            'ORDER BY id LIMIT 1'),
+        'intro': [row[0] for row in cursor.execute(
+            'SELECT course_code FROM courses WHERE level <= 100 ORDER BY course_code LIMIT 40')],
+        'codes': [row[0] for row in cursor.execute('SELECT course_code FROM courses ORDER BY id LIMIT 50')],
+        'targets': [row[0] for row in cursor.execute(
+            'SELECT course_code FROM major_requirements WHERE major_id = '
+            '(SELECT MIN(id) FROM majors) ORDER BY course_code LIMIT 12')]
+    }
+    conn.close()
+    return inputs
+
+
+def flask_cases(inputs):
+    # Course codes contain a space
+    popular, advanced, graded = quote(inputs['popular']), quote(inputs['advanced']), quote(inputs['graded'])
+    major, intro, codes = inputs['major'], inputs['intro'], inputs['codes']
+
+    def cold_completed(iteration):
+        # A different completed set per request, so the eligibility cache misses
+        return {'completed': intro[:iteration % len(intro) + 1] + [f'BENCH {iteration}']} if intro else {
+            'completed': [f'BENCH {iteration}']}
+
+    return [
+        Case('GET /', 'GET', '/'),
+        Case('GET /api/majors', 'GET', '/api/majors'),
+        Case('GET /api/majors/<int:major_id>/requirements', 'GET', f'/api/majors/{major}/requirements'),
+        Case('POST /api/majors/<int:major_id>/progress', 'POST', f'/api/majors/{major}/progress',
+             {'completed': intro}),
+        Case('GET /api/courses', 'GET', '/api/courses'),
+        Case('GET /api/courses?stream=1', 'GET', '/api/courses?stream=1'),
+        Case('GET /api/courses?fields&limit', 'GET', '/api/courses?fields=code,title&limit=100'),
+        Case('GET /api/courses?dept', 'GET', f"/api/courses?dept={inputs['department']}"),
+        Case('GET /api/courses?codes', 'GET', '/api/courses?codes=' + quote(','.join(codes[:20]))),
+        Case('POST /api/courses', 'POST', '/api/courses', {'codes': codes}),
+        Case('GET /api/courses/<course_code>', 'GET', f'/api/courses/{advanced}'),
+        Case('GET /api/courses/<course_code>/prereq-tree', 'GET', f'/api/courses/{advanced}/prereq-tree'),
+        Case('GET /api/courses/<course_code>/unlocks', 'GET', f'/api/courses/{popular}/unlocks'),
+        Case('POST /api/courses/eligible', 'POST', '/api/courses/eligible', {'completed': intro}),
+        Case(f'POST /api/courses/eligible ({COLD})', 'POST', '/api/courses/eligible', cold_completed),
+        Case('POST /api/plan', 'POST', '/api/plan', {'completed': intro[:10], 'targets': inputs['targets']}),
+        Case('GET /api/search', 'GET', '/api/search?q=algorithms'),
+        Case('GET /api/courses/<course_code>/grades', 'GET', f'/api/courses/{graded}/grades'),
+        Case('GET /api/courses/<course_code>/grades?stream=1', 'GET', f'/api/courses/{graded}/grades?stream=1'),
+        Case('GET /api/_metrics', 'GET', '/api/_metrics')
+    ]
+
+
+def vercel_cases(inputs):
+    """Keyed by handler file, relative to api/"""
+    # Course codes contain a space
+    popular, advanced, graded = quote(inputs['popular']), quote(inputs['advanced']), quote(inputs['graded'])
+    major, intro, codes = inputs['major'], inputs['intro'], inputs['codes']
+    return {
+        'majors.py': [Case('vercel majors', 'GET', '/api/majors')],
+        'major-requirements.py': [Case('vercel major-requirements', 'GET', f'/api/major-requirements?id={major}')],
+        'majors/[id]/requirements.py': [
+            Case('vercel majors/[id]/requirements', 'GET', f'/api/majors/{major}/requirements')],
+        'majors/[id]/progress.py': [
+            Case('vercel majors/[id]/progress', 'POST', f'/api/majors/{major}/progress', {'completed': intro})],
+        'courses.py': [
+            Case('vercel courses', 'GET', '/api/courses'),
+            Case('vercel courses?stream=1', 'GET', '/api/courses?stream=1'),
+            Case('vercel courses?codes', 'GET', '/api/courses?codes=' + quote(','.join(codes[:20]))),
+            Case('vercel courses POST', 'POST', '/api/courses', {'codes': codes})
+        ],
+        'course.py': [Case('vercel course', 'GET', f'/api/course?code={advanced}')],
+        'prereq-tree.py': [Case('vercel prereq-tree', 'GET', f'/api/prereq-tree?code={advanced}')],
+        'unlocks.py': [Case('vercel unlocks', 'GET', f'/api/unlocks?code={popular}')],
+        'eligible.py': [Case('vercel eligible', 'POST', '/api/eligible', {'completed': intro})],
+        'plan.py': [Case('vercel plan', 'POST', '/api/plan', {'completed': intro[:10], 'targets': inputs['targets']})],
+        'search.py': [Case('vercel search', 'GET', '/api/search?q=algorithms')],
+        'grades.py': [
+            Case('vercel grades', 'GET', f'/api/grades?code={graded}'),
+            Case('vercel grades?stream=1', 'GET', f'/api/grades?code={graded}&stream=1')
+        ],
+        'metrics.py': [Case('vercel metrics', 'GET', '/api/_metrics')]
+    }
+
+
+class FlaskTarget:
+    """Sends cases to api.app through the Flask test client"""
+
+    def __init__(self):
+        import api
+        self.app = api.app
+        self.client = api.app.test_client()
+
+    def missing_routes(self, cases):
+        """Route rules with no case, by `METHOD rule` name"""
+        covered = {case.name.split('?')[0].split(' (')[0] for case in cases}
+        missing = []
+        for rule in self.app.url_map.iter_rules():
+            if rule.endpoint == 'static':
+                continue
+            for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+                if f'{method} {rule.rule}' not in covered:
+                    missing.append(f'{method} {rule.rule}')
+        return missing
+
+    def request(self, case, iteration):
+        response = self.client.open(case.path, method=case.method, data=case.encoded_body(iteration),
+                                    content_type='application/json')
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, int(response.headers.get('X-Query-Count', 0)), size
+
+
+class _FakeSocket:
+    """Just enough of a socket for StreamRequestHandler: one request in, everything written kept"""
+
+    def __init__(self, request):
+        self._request = request
+        self.sent = bytearray()
+
+    def makefile(self, mode, buffering=None):
+        return io.BytesIO(self._request)
+
+    def sendall(self, data):
+        self.sent += data
+
+
+class VercelTarget:
+    """Runs the BaseHTTPRequestHandler classes in api/ on raw requests"""
+
+    def __init__(self):
+        # backend/search.py must be imported before api/ goes on the path: the
+        # search handler is also called search.py and imports it by that name
+        import search
+        sys.path.insert(0, VERCEL_DIR)
+        import _db
+        self._db = _db
+        self.handlers = {}
+        for path in sorted(glob.glob(os.path.join(VERCEL_DIR, '**', '*.py'), recursive=True)):
+            relative = os.path.relpath(path, VERCEL_DIR).replace(os.sep, '/')
+            if os.path.basename(path).startswith('_'):
+                continue
+            name = 'vercel_' + ''.join(c if c.isalnum() else '_' for c in relative[:-3])
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            # Quiet subclass: the stock handler logs every request to stderr
+            self.handlers[relative] = type('BenchHandler', (module.handler,),
+                                           {'log_message': lambda self, *args: None})
+
+    def request(self, handler, case, iteration):
+        body = case.encoded_body(iteration)
+        head = (f'{case.method} {case.path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n')
+        connection = _FakeSocket(head.encode('latin-1') + body)
+        handler(connection, ('127.0.0.1', 0), None)
+
+        response = bytes(connection.sent)
+        status = int(response.split(b' ', 2)[1])
+        size = len(response) - response.find(b'\r\n\r\n') - 4
+        return status, self._db.connections.query_count(), size
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def measure(send, case, iterations):
+    """Run one case: warm-up, timed requests, then one request under tracemalloc"""
+    for iteration in range(WARMUP_ITERATIONS):
+        send(case, iteration)
+
+    latencies = []
+    statements = None
+    for iteration in range(WARMUP_ITERATIONS, WARMUP_ITERATIONS + iterations):
+        started = time.perf_counter()
+        status, statements, size = send(case, iteration)
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    send(case, WARMUP_ITERATIONS + iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {f'p{int(q * 100)}_ms': round(_percentile(latencies, q) * 1000, 3) for q in PERCENTILES}
+    result.update({
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'status': status,
+        'sql': statements,
+        'peak_kb': round(peak / 1024, 1),
+        'bytes': size
+    })
+    return result
+
+
+def _timed_load(load):
+    # Timed and traced separately: tracemalloc slows allocation-heavy code severalfold
+    started = time.perf_counter()
+    load()
+    elapsed = round((time.perf_counter() - started) * 1000, 3)
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'p50_ms': elapsed, 'p95_ms': elapsed, 'p99_ms': elapsed, 'mean_ms': elapsed,
+            'status': None, 'sql': None, 'peak_kb': round(peak / 1024, 1), 'bytes': None}
+
+def measure_catalog_load(database):
+    """Time and peak memory of building a catalog snapshot from the database"""
+    from catalog import load_catalog
+    return _timed_load(lambda: load_catalog(database))
+
+def measure_snapshot_load(database):
+    """Time and peak memory of reading the same catalog from a prebuilt snapshot file"""
+    from catalog import load_catalog
+    from catalog_snapshot import database_fingerprint, read_snapshot, write_snapshot
+
+    catalog = load_catalog(database)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'catalog.snapshot')
+        write_snapshot(catalog, path, database_fingerprint(database))
+        result = _timed_load(lambda: read_snapshot(path, database, catalog.generation))
+        result['bytes'] = os.path.getsize(path)
+    return result
+
+
+def run(database, iterations=DEFAULT_ITERATIONS, only=None, progress=None):
+    """
+    Benchmark every route and handler against `database`. `only` is a substring
+    a case name must contain. Returns {'meta': ..., 'cases': {name: result}}.
+    """
+    database = os.path.abspath(database)
+    if not os.path.exists(database):
+        raise FileNotFoundError(f"Database file '{database}' not found")
+
+    # api.py and api/_db.py read these at import; the shared response cache is
+    # left off so results don't depend on files left behind by earlier runs
+    os.environ['DATABASE_PATH'] = database
+    os.environ.setdefault('RESPONSE_CACHE_DIR', '')
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    inputs = sample_inputs(database)
+    results = {}
+
+    def record(name, measure_case):
+        if only and only not in name:
+            return
+        results[name] = measure_case()
+        if progress:
+            progress(name, results[name])
+
+    record('catalog load', lambda: measure_catalog_load(database))
+    record('catalog snapshot load', lambda: measure_snapshot_load(database))
+
+    flask = FlaskTarget()
+    cases = flask_cases(inputs)
+    for case in cases:
+        record(case.name, lambda: measure(lambda c, i: flask.request(c, i), case, iterations))
+
+    vercel = VercelTarget()
+    handler_cases = vercel_cases(inputs)
+    for relative, handler in vercel.handlers.items():
+        for case in handler_cases.get(relative, ()):
+            record(case.name, lambda: measure(lambda c, i: vercel.request(handler, c, i), case, iterations))
+
+    conn = sqlite3.connect(database)
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+              for table in ('courses', 'prerequisites', 'grade_distributions')}
+    conn.close()
+
+    return {
+        'meta': {
+            'database': database,
+            'counts': counts,
+            'iterations': iterations,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'unbenchmarked': flask.missing_routes(cases) +
+                             sorted(set(vercel.handlers) - set(handler_cases))
+        },
+        'cases': results
+    }
+
+
+def format_result(name, result):
+    sql = '-' if result['sql'] is None else result['sql']
+    return (f"{name:52} p50 {result['p50_ms']:9.3f}  p95 {result['p95_ms']:9.3f}  "
+            f"p99 {result['p99_ms']:9.3f} ms  sql {sql:>4}  peak {result['peak_kb']:9.1f} KB")
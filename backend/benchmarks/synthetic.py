@@ -0,0 +1,250 @@
+# Synthetic catalog databases for benchmarking, in the same schema the scrapers
+# and the grade importer produce. Courses get AND/OR prerequisite groups drawn
+# mostly from lower-numbered courses of the same department, weighted towards
+# intro courses, so a few courses have very large fan-in as in the real catalog.
+# Rollups, derived columns, the search index and the indexes are then built by
+# the same code the importer and add_indexes.py use.
+import os
+import random
+import sqlite3
+import time
+
+from add_indexes import add_indexes
+from catalog_generation import bump_generation
+from course_derived import refresh_course_derived
+from grade_rollups import refresh_grade_rollups
+from search import refresh_search_index
+
+# Named scales for `python -m benchmarks generate --scale ...`
+SCALES = {
+    'small': {'courses': 2000, 'sections_per_course': 10},
+    'medium': {'courses': 20000, 'sections_per_course': 15},
+    'large': {'courses': 100000, 'sections_per_course': 20}
+}
+
+TERMS = ('Spring', 'Summer', 'Fall')
+FIRST_YEAR = 2010
+
+SCHEMA = '''
+    CREATE TABLE courses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_code TEXT UNIQUE NOT NULL,
+        course_number TEXT NOT NULL,
+        title TEXT NOT NULL,
+        credits TEXT,
+        credits_undergrad INTEGER,
+        credits_grad INTEGER,
+        description TEXT,
+        level INTEGER,
+        difficulty TEXT,
+        raw_text TEXT
+    );
+    CREATE TABLE prerequisites (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_id INTEGER NOT NULL,
+        prerequisite_code TEXT NOT NULL,
+        logic_type TEXT DEFAULT 'OR',
+        group_id INTEGER DEFAULT 0,
+        FOREIGN KEY (course_id) REFERENCES courses(id),
+        UNIQUE(course_id, prerequisite_code)
+    );
+    CREATE TABLE semesters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        term TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        UNIQUE(term, year)
+    );
+    CREATE TABLE grade_distributions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_code TEXT NOT NULL,
+        semester_id INTEGER NOT NULL,
+        instructor TEXT,
+        grade_a INTEGER DEFAULT 0,
+        grade_b INTEGER DEFAULT 0,
+        grade_c INTEGER DEFAULT 0,
+        grade_d INTEGER DEFAULT 0,
+        grade_f INTEGER DEFAULT 0,
+        grade_w INTEGER DEFAULT 0,
+        grade_s INTEGER DEFAULT 0,
+        grade_u INTEGER DEFAULT 0,
+        total_students INTEGER DEFAULT 0,
+        FOREIGN KEY (semester_id) REFERENCES semesters(id),
+        UNIQUE(course_code, semester_id, instructor)
+    );
+    CREATE TABLE majors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        concentration TEXT,
+        UNIQUE(name, concentration)
+    );
+    CREATE TABLE major_requirements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        major_id INTEGER NOT NULL,
+        course_code TEXT NOT NULL,
+        requirement_type TEXT NOT NULL,
+        FOREIGN KEY (major_id) REFERENCES majors(id),
+        UNIQUE(major_id, course_code)
+    );
+    CREATE TABLE major_electives (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        major_id INTEGER NOT NULL,
+        course_code TEXT NOT NULL,
+        elective_type TEXT NOT NULL,
+        FOREIGN KEY (major_id) REFERENCES majors(id),
+        UNIQUE(major_id, course_code)
+    );
+'''
+
+WORDS = ('algorithms', 'analysis', 'systems', 'design', 'theory', 'applications', 'introduction',
+         'advanced', 'topics', 'methods', 'data', 'structures', 'networks', 'statistics', 'calculus',
+         'linear', 'algebra', 'programming', 'laboratory', 'seminar', 'research', 'writing',
+         'literature', 'history', 'physics', 'chemistry', 'biology', 'economics', 'probability',
+         'optimization', 'security', 'databases', 'learning', 'communication', 'ethics', 'policy')
+
+INSTRUCTORS = tuple(f'{last}, {first}' for last in ('Smith', 'Lee', 'Garcia', 'Patel', 'Chen', 'Nguyen',
+                                                      'Kim', 'Brown', 'Davis', 'Lopez', 'Wilson', 'Khan')
+                    for first in 'ABCDEFGH')
+
+def _department_names(count):
+    names = []
+    for i in range(count):
+        name = ''
+        i += 26  # two letters at least
+        while i:
+            i, letter = divmod(i, 26)
+            name = chr(ord('A') + letter) + name
+        names.append(name)
+    return names
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def _generate_courses(rng, course_count):
+    """[(code, department, number)] with about 50 courses per department"""
+    departments = _department_names(max(1, course_count // 50))
+    per_department = -(-course_count // len(departments))
+    courses = []
+    for department in departments:
+        for number in sorted(rng.sample(range(100, 600), per_department)):
+            courses.append((f'{department} {number}', department, number))
+    return courses[:course_count]
+
+def _prerequisite_rows(rng, courses, ids):
+    """AND groups of OR options, drawn mostly from lower-numbered courses in the same department"""
+    by_department = {}
+    for code, department, number in sorted(courses, key=lambda course: course[2]):
+        by_department.setdefault(department, []).append((number, code))
+    intro = [code for code, _, number in courses if number < 200]
+
+    rows = []
+    for code, department, number in courses:
+        lower = [other for other_number, other in by_department[department] if other_number < number]
+        if not lower or rng.random() < 0.25:
+            continue
+        chosen = set()
+        for group in range(rng.choice((1, 1, 1, 2, 2, 3))):
+            for _ in range(rng.choice((1, 1, 2, 3))):
+                if intro and rng.random() < 0.15:
+                    option = rng.choice(intro)
+                else:
+                    # Squared draw favours the lowest numbers: intro courses get the most dependents
+                    option = lower[int(len(lower) * rng.random() ** 2)]
+                if option != code and option not in chosen:
+                    chosen.add(option)
+                    rows.append((ids[code], option, 'OR', group))
+    return rows
+
+def generate(path, courses=2000, sections_per_course=10, majors=None, seed=1):
+    """
+    Write a synthetic catalog to `path` (replacing it). About 60% of courses get
+    grade data, `sections_per_course` rows each on average, so the
+    grade_distributions table has roughly 0.6 * courses * sections_per_course rows.
+    Returns a dict of row counts.
+    """
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    cursor = conn.cursor()
+
+    generated = _generate_courses(rng, courses)
+    cursor.executemany('''
+        INSERT INTO courses (course_code, course_number, title, credits, credits_undergrad, credits_grad,
+                             description, level, difficulty, raw_text)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, '')
+    ''', (
+        (code, str(number), _phrase(rng, 3).title(), rng.choice(('3 hours.', '4 hours.', '1-3 hours.', None)),
+         rng.choice((None, 3, 3, 4)), None, _phrase(rng, rng.randint(15, 40)) + '.', number // 100 * 100,
+         rng.choice((None, 'Light', 'Moderate', 'Challenging')))
+        for code, _, number in generated
+    ))
+    cursor.execute('SELECT course_code, id FROM courses')
+    ids = dict(cursor.fetchall())
+
+    cursor.executemany('''
+        INSERT OR IGNORE INTO prerequisites (course_id, prerequisite_code, logic_type, group_id)
+        VALUES (?, ?, ?, ?)
+    ''', _prerequisite_rows(rng, generated, ids))
+
+    semesters = [(term, year) for year in range(FIRST_YEAR, FIRST_YEAR + 15) for term in TERMS]
+    cursor.executemany('INSERT INTO semesters (term, year) VALUES (?, ?)', semesters)
+
+    def sections():
+        for code, _, _ in generated:
+            if rng.random() >= 0.6:
+                continue
+            seen = set()
+            for _ in range(max(1, int(rng.expovariate(1 / sections_per_course)))):
+                key = (rng.randint(1, len(semesters)), rng.choice(INSTRUCTORS))
+                if key in seen:
+                    continue
+                seen.add(key)
+                counts = [rng.randint(0, 40), rng.randint(0, 40), rng.randint(0, 25), rng.randint(0, 10),
+                          rng.randint(0, 10), rng.randint(0, 8), 0, 0]
+                yield (code, key[0], key[1], *counts, sum(counts))
+
+    cursor.executemany('''
+        INSERT INTO grade_distributions
+        (course_code, semester_id, instructor, grade_a, grade_b, grade_c, grade_d, grade_f,
+         grade_w, grade_s, grade_u, total_students)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', sections())
+
+    # A major per ~500 courses, each drawing its requirements from a few departments
+    codes_by_department = {}
+    for code, department, _ in generated:
+        codes_by_department.setdefault(department, []).append(code)
+    departments = sorted(codes_by_department)
+    for major_index in range(majors or max(2, courses // 500)):
+        cursor.execute('INSERT INTO majors (name, concentration) VALUES (?, ?)',
+                       (f'{_phrase(rng, 2).title()} {major_index}', rng.choice((None, _phrase(rng, 1).title()))))
+        major_id = cursor.lastrowid
+        for department in rng.sample(departments, min(3, len(departments))):
+            pool = codes_by_department[department]
+            for code in rng.sample(pool, min(12, len(pool))):
+                cursor.execute('INSERT OR IGNORE INTO major_requirements (major_id, course_code, requirement_type) '
+                               'VALUES (?, ?, ?)', (major_id, code, f'Required {department}'))
+            for code in rng.sample(pool, min(10, len(pool))):
+                cursor.execute('INSERT OR IGNORE INTO major_electives (major_id, course_code, elective_type) '
+                               'VALUES (?, ?, ?)', (major_id, code, f'{department} Electives'))
+    conn.commit()
+
+    # Everything the importer and scrapers maintain on top of the raw rows
+    refresh_grade_rollups(conn)
+    refresh_course_derived(conn)
+    refresh_search_index(conn)
+    bump_generation(conn)
+    conn.commit()
+
+    counts = {}
+    for table in ('courses', 'prerequisites', 'grade_distributions', 'majors', 'major_requirements'):
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        counts[table] = cursor.fetchone()[0]
+    conn.close()
+
+    add_indexes(path)
+    counts['seconds'] = round(time.perf_counter() - started, 1)
+    return counts
@@ -0,0 +1,560 @@
+import base64
+import binascii
+import hashlib
+import os
+import sqlite3
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+
+from catalog_generation import read_generation
+from catalog_snapshot import read_snapshot, snapshot_path
+from course_derived import derive_course
+from degree_progress import DegreeProgress
+from eligibility import EligibilityEngine
+from grade_rollups import letter_grade_totals
+from planner import DEFAULT_CREDIT_CAP, DEFAULT_MAX_TERMS, Planner
+from prereq_graph import PrerequisiteGraph
+from response_cache import encode_json
+
+# Keys of a course payload, in response order (valid values for ?fields=)
+COURSE_FIELDS = ('id', 'code', 'title', 'credits', 'creditsUndergrad', 'creditsGrad', 'level',
+                 'difficulty', 'description', 'prerequisiteGroups', 'prerequisitesFormatted')
+
+# Page sizes for GET /api/courses?limit=...
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Most codes one multi-get (?codes= or POST /api/courses) may ask for
+MAX_LOOKUP_CODES = 500
+
+def format_prerequisites_from_list(prereq_list):
+    """
+    Format prerequisites from a list of dicts with 'code' and 'group' keys.
+    Returns: {
+        'groups': [[course1, course2], [course3], ...],
+        'formatted': 'string representation'
+    }
+    """
+    if not prereq_list:
+        return {'groups': [], 'formatted': 'None'}
+
+    groups_dict = defaultdict(list)
+    for prereq in prereq_list:
+        groups_dict[prereq['group']].append(prereq['code'])
+
+    # Convert to list of lists
+    groups = [groups_dict[gid] for gid in sorted(groups_dict.keys())]
+
+    # Format as string: (A OR B) AND C AND (D OR E)
+    formatted_parts = []
+    for group in groups:
+        if len(group) == 1:
+            formatted_parts.append(group[0])
+        else:
+            formatted_parts.append('(' + ' or '.join(group) + ')')
+
+    formatted = ' and '.join(formatted_parts) if formatted_parts else 'None'
+
+    return {
+        'groups': groups,
+        'formatted': formatted
+    }
+
+
+class Catalog:
+    """
+    Read-only snapshot of the course catalog.
+
+    Holds every course as a ready-to-serve dict (in `ORDER BY course_number`
+    order), the grouped prerequisites and the major requirement lists. Nothing here touches SQLite after construction, and the
+    dicts are shared between requests, so callers must copy before changing them.
+    `generation` is the database's catalog generation when the snapshot was read.
+    """
+
+    def __init__(self, courses, prereq_rows, majors, requirement_rows, elective_rows, generation=0):
+        self.generation = generation
+
+        # `courses` rows carry the derived columns (slug, credits, difficulty)
+        prereqs_by_course = defaultdict(list)
+        for prereq in prereq_rows:
+            prereqs_by_course[prereq['course_id']].append({
+                'code': prereq['prerequisite_code'],
+                'group': prereq['group_id']
+            })
+
+        courses_list = []
+        index = {}
+        for course in courses:
+            prereq_data = format_prerequisites_from_list(prereqs_by_course.get(course['id']))
+
+            index[course['course_code']] = len(courses_list)
+            courses_list.append({
+                'id': course['slug'],
+                'code': course['course_code'],
+                'title': course['title'],
+                'credits': course['credits_undergrad'],  # Default to undergrad for backwards compatibility
+                'creditsUndergrad': course['credits_undergrad'],
+                'creditsGrad': course['credits_grad'],
+                'level': course['level'],
+                'difficulty': course['difficulty'],
+                'description': course['description'],
+                'prerequisiteGroups': prereq_data['groups'],
+                'prerequisitesFormatted': prereq_data['formatted']
+            })
+
+        self.courses = tuple(courses_list)
+        self._index = index
+
+        # Department -> catalog positions, already in catalog order
+        departments = defaultdict(list)
+        for pos, course in enumerate(self.courses):
+            departments[course['code'].split()[0]].append(pos)
+        self._departments = {dept: tuple(positions) for dept, positions in departments.items()}
+        self.eligibility = EligibilityEngine(self.courses, index)
+        self.prereq_graph = PrerequisiteGraph(self.courses)
+        self.planner = Planner(self.courses, self.prereq_graph)
+
+        self.majors = tuple({
+            'id': major['id'],
+            'name': major['name'],
+            'concentration': major['concentration']
+        } for major in majors)
+        self._majors_by_id = {major['id']: major for major in self.majors}
+
+        requirements = defaultdict(list)
+        for row in requirement_rows:
+            requirements[row['major_id']].append((row['course_code'], row['requirement_type']))
+        self._requirements = {major_id: tuple(rows) for major_id, rows in requirements.items()}
+
+        electives = defaultdict(list)
+        for row in elective_rows:
+            electives[row['major_id']].append((row['course_code'], row['elective_type']))
+        self._electives = {major_id: tuple(rows) for major_id, rows in electives.items()}
+        self._major_payloads = {}
+        self.degree_progress = DegreeProgress(self.courses, index, self._requirements, self._electives,
+                                              self.eligibility, self.planner)
+
+        # Each course encoded once, so list responses are just joined bytes
+        self.course_json = tuple(encode_json(course) for course in self.courses)
+
+        # Content hash of everything the API serves from this snapshot
+        digest = hashlib.sha1()
+        for fragment in self.course_json:
+            digest.update(fragment)
+            digest.update(b'\n')
+        digest.update(encode_json([
+            self.majors,
+            sorted(self._requirements.items()),
+            sorted(self._electives.items())
+        ]))
+        self.version = digest.hexdigest()
+
+    def __len__(self):
+        return len(self.courses)
+
+    def position(self, course_code):
+        """Return the catalog position of a course code, or None"""
+        return self._index.get(course_code)
+
+    def courses_json(self):
+        """The full course list as JSON bytes"""
+        return b'[' + b','.join(self.course_json) + b']'
+
+    def majors_json(self):
+        """The major list as JSON bytes"""
+        return encode_json(list(self.majors))
+
+    def warm_responses(self):
+        """
+        (cache key, build_body) for the GET responses every client asks for: the
+        course list, the major list and each major's requirements.
+        """
+        yield 'courses', self.courses_json
+        yield 'majors', self.majors_json
+        for major in self.majors:
+            major_id = major['id']
+            yield (f'majors/{major_id}/requirements',
+                   lambda major_id=major_id: encode_json(self.major_requirements(major_id)))
+
+    def query_courses_json(self, fields=None, dept=None, limit=None, cursor=None):
+        """
+        Encoded GET /api/courses response for the optional query parameters
+        (raw strings): `fields` is a comma-separated projection, `dept` a
+        department code, `limit` a page size and `cursor` a previous page's
+        `nextCursor`. Without `limit` or `cursor` the body is a plain list,
+        otherwise {'courses': [...], 'nextCursor': ...}.
+        Raises ValueError for invalid parameters.
+        """
+        fields = _parse_fields(fields)
+
+        positions = self._departments.get(dept.upper(), ()) if dept else range(len(self.courses))
+
+        paged = limit is not None or cursor is not None
+        if paged:
+            page_size = _parse_page_size(limit)
+            start = 0
+            if cursor:
+                after = self._index.get(_decode_cursor(cursor))
+                if after is None:
+                    raise ValueError('Invalid cursor')
+                start = bisect_right(positions, after)
+            more = start + page_size < len(positions)
+            positions = positions[start:start + page_size]
+
+        body = self._courses_body(positions, fields)
+
+        if not paged:
+            return body
+
+        next_cursor = _encode_cursor(self.courses[positions[-1]]['code']) if more and positions else None
+        return b'{"courses":' + body + b',"nextCursor":' + encode_json(next_cursor) + b'}'
+
+    def lookup_courses_json(self, codes, fields=None):
+        """
+        Encoded multi-get response: {'courses': [...], 'notFound': [...]} for
+        `codes` (a comma-separated string or a list), in request order without
+        duplicates. `fields` is an optional projection as in `query_courses_json`.
+        Raises ValueError for invalid parameters.
+        """
+        if isinstance(codes, str):
+            codes = codes.split(',')
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise ValueError('codes must be a list of course codes')
+
+        codes = list(dict.fromkeys(code.strip().upper() for code in codes if code.strip()))
+        if not codes:
+            raise ValueError('No course codes given')
+        if len(codes) > MAX_LOOKUP_CODES:
+            raise ValueError(f'At most {MAX_LOOKUP_CODES} codes per request')
+
+        fields = _parse_fields(fields)
+        positions = []
+        not_found = []
+        for code in codes:
+            pos = self._index.get(code)
+            if pos is None:
+                not_found.append(code)
+            else:
+                positions.append(pos)
+
+        return (b'{"courses":' + self._courses_body(positions, fields)
+                + b',"notFound":' + encode_json(not_found) + b'}')
+
+    def _courses_body(self, positions, fields):
+        # Full courses are joined from their pre-encoded JSON; projections are encoded here
+        if fields is None:
+            return b'[' + b','.join(self.course_json[pos] for pos in positions) + b']'
+        return encode_json([{field: self.courses[pos][field] for field in fields} for pos in positions])
+
+    def get_course(self, course_code):
+        """Return the course dict for an exact course code, or None"""
+        pos = self._index.get(course_code)
+        return self.courses[pos] if pos is not None else None
+
+    def eligible_courses(self, completed_codes):
+        """Courses whose prerequisites are met by `completed_codes`, minus the completed ones"""
+        positions = self.eligibility.eligible_positions(set(completed_codes))
+        return [self.courses[pos] for pos in positions]
+
+    def eligible_courses_json(self, completed_codes):
+        """`eligible_courses` as JSON bytes, joined from the pre-encoded courses"""
+        positions = self.eligibility.eligible_positions(set(completed_codes))
+        return b'[' + b','.join(self.course_json[pos] for pos in positions) + b']'
+
+    def prerequisite_tree(self, course_code):
+        """Build the /api/courses/<code>/prereq-tree payload, or None if the course doesn't exist"""
+        if course_code not in self._index:
+            return None
+
+        graph = self.prereq_graph
+        closure = graph.closure(course_code)
+        return {
+            'code': course_code,
+            'tree': graph.tree(course_code),
+            'prerequisites': sorted(closure),
+            'hasCycle': course_code in graph.cyclic or not graph.cyclic.isdisjoint(closure)
+        }
+
+    def unlocks(self, course_code):
+        """Build the /api/courses/<code>/unlocks payload, or None if the course doesn't exist"""
+        if course_code not in self._index:
+            return None
+
+        unlocks = self.prereq_graph.unlocks(course_code)
+        return {
+            'code': course_code,
+            'direct': unlocks['direct'],
+            'transitive': unlocks['transitive']
+        }
+
+    def get_major(self, major_id):
+        return self._majors_by_id.get(major_id)
+
+    def required_course_codes(self, major_id):
+        """Codes of a major's required courses (electives excluded)"""
+        return [course_code for course_code, _ in self._requirements.get(major_id, ())]
+
+    def plan(self, completed_codes, target_codes, major_id=None,
+             credit_cap=DEFAULT_CREDIT_CAP, max_terms=DEFAULT_MAX_TERMS):
+        """
+        Build the POST /api/plan payload: a term-by-term schedule for `target_codes`
+        plus the required courses of `major_id`, if given.
+        """
+        targets = set(target_codes)
+        if major_id is not None:
+            targets.update(self.required_course_codes(major_id))
+
+        return self.planner.plan(completed_codes, targets, credit_cap, max_terms)
+
+    def major_progress(self, major_id, completed_codes):
+        """Build the /api/majors/<id>/progress payload, or None if the major doesn't exist"""
+        major = self._majors_by_id.get(major_id)
+        if major is None:
+            return None
+
+        progress = {'major': dict(major)}
+        progress.update(self.degree_progress.audit(major_id, completed_codes))
+        return progress
+
+    def major_requirements(self, major_id):
+        """
+        The /api/majors/<id>/requirements payload, or None if the major doesn't
+        exist. Built from the snapshot on first request and memoized per major.
+        """
+        payload = self._major_payloads.get(major_id)
+        if payload is not None:
+            return payload
+
+        major = self._majors_by_id.get(major_id)
+        if major is None:
+            return None
+
+        required_courses = []
+        for course_code, requirement_type in self._requirements.get(major_id, ()):
+            course = self.get_course(course_code)
+            if course:
+                required_courses.append(dict(course, requirementType=requirement_type))
+
+        elective_courses = []
+        for course_code, elective_type in self._electives.get(major_id, ()):
+            course = self.get_course(course_code)
+            if course:
+                elective_courses.append(dict(course, electiveType=elective_type))
+
+        payload = {
+            'major': dict(major),
+            'requiredCourses': required_courses,
+            'electiveCourses': elective_courses
+        }
+        self._major_payloads[major_id] = payload
+        return payload
+
+
+def _parse_fields(fields):
+    # Comma-separated string or list of payload keys -> tuple, or None for every field
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise ValueError('fields must be a list of field names')
+
+    fields = tuple(field.strip() for field in fields if field.strip())
+    unknown = [field for field in fields if field not in COURSE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields or None
+
+def _parse_page_size(limit):
+    if limit is None or limit == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        page_size = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if page_size < 1:
+        raise ValueError('limit must be positive')
+    return min(page_size, MAX_PAGE_SIZE)
+
+# Cursors name the last course of the previous page, so they stay valid
+# across catalog reloads as long as that course still exists
+def _encode_cursor(course_code):
+    return base64.urlsafe_b64encode(course_code.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+def _load_courses(cursor):
+    """Course rows joined with their course_derived values"""
+    if _table_exists(cursor, 'course_derived'):
+        cursor.execute('''
+            SELECT c.id, c.course_code, c.title, c.description, c.level,
+                   d.slug, d.credits_undergrad, d.credits_grad, d.difficulty
+            FROM courses c
+            LEFT JOIN course_derived d ON d.course_code = c.course_code
+            ORDER BY c.course_number
+        ''')
+        courses = cursor.fetchall()
+        if all(course['slug'] is not None for course in courses):
+            return courses
+
+    # Database predates course_derived (or hasn't been refreshed): derive in memory
+    cursor.execute('''
+        SELECT id, course_code, course_number, title, credits, credits_undergrad, credits_grad, description, level, difficulty
+        FROM courses
+        ORDER BY course_number
+    ''')
+    courses = cursor.fetchall()
+
+    grade_totals = letter_grade_totals(cursor)
+
+    result = []
+    for course in courses:
+        derived = derive_course(course, grade_totals.get(course['course_code']))
+        derived.update({
+            'id': course['id'],
+            'course_code': course['course_code'],
+            'title': course['title'],
+            'description': course['description'],
+            'level': course['level']
+        })
+        result.append(derived)
+    return result
+
+def _connect(database, uri=None):
+    # `uri` (an SQLite file: URI) opens the database another way, e.g. the
+    # read-only immutable copy the Vercel handlers serve from
+    return sqlite3.connect(uri, uri=True) if uri else sqlite3.connect(database)
+
+def load_catalog(database, uri=None):
+    """Read the whole catalog from SQLite in a handful of bulk queries"""
+    conn = _connect(database, uri)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.cursor()
+
+        # Read first: a write racing the load then shows up as a newer generation
+        generation = read_generation(cursor)
+        courses = _load_courses(cursor)
+
+        cursor.execute('''
+            SELECT course_id, prerequisite_code, group_id
+            FROM prerequisites
+            ORDER BY course_id, group_id, prerequisite_code
+        ''')
+        prereq_rows = cursor.fetchall()
+
+        # Major tables are created by a separate scraper and may not exist yet
+        majors = requirement_rows = elective_rows = []
+        if _table_exists(cursor, 'majors'):
+            cursor.execute('''
+                SELECT id, name, concentration
+                FROM majors
+                ORDER BY name, concentration
+            ''')
+            majors = cursor.fetchall()
+
+            # Requirements and electives for every major in one pass
+            cursor.execute('''
+                SELECT 'required' AS kind, major_id, course_code, requirement_type AS type
+                FROM major_requirements
+                UNION ALL
+                SELECT 'elective' AS kind, major_id, course_code, elective_type AS type
+                FROM major_electives
+                ORDER BY kind DESC, major_id, type, course_code
+            ''')
+            requirement_rows = []
+            elective_rows = []
+            for row in cursor.fetchall():
+                if row['kind'] == 'required':
+                    requirement_rows.append({'major_id': row['major_id'], 'course_code': row['course_code'],
+                                             'requirement_type': row['type']})
+                else:
+                    elective_rows.append({'major_id': row['major_id'], 'course_code': row['course_code'],
+                                          'elective_type': row['type']})
+    finally:
+        conn.close()
+
+    return Catalog(courses, prereq_rows, majors, requirement_rows, elective_rows, generation)
+
+
+# One snapshot per database file, shared by every request in the process
+_catalogs = {}  # database -> (catalog, file signature at the last check)
+_catalogs_lock = threading.Lock()
+_load_listeners = []
+
+def add_load_listener(callback):
+    """Call `callback(database, catalog)` after every snapshot load, before it is served"""
+    _load_listeners.append(callback)
+
+def _file_signature(database):
+    # Any commit changes the size or mtime of the database or its WAL file
+    signature = []
+    for path in (database, database + '-wal'):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def _database_generation(database, uri=None):
+    conn = _connect(database, uri)
+    try:
+        return read_generation(conn.cursor())
+    finally:
+        conn.close()
+
+def _load(database, signature, uri=None, use_snapshot=True):
+    # A prebuilt snapshot for the current generation skips the queries and the build
+    catalog = None
+    path = snapshot_path(database)
+    if use_snapshot and os.path.exists(path):
+        catalog = read_snapshot(path, database, _database_generation(database, uri))
+    if catalog is None:
+        catalog = load_catalog(database, uri)
+    for callback in _load_listeners:
+        callback(database, catalog)
+    _catalogs[database] = (catalog, signature)
+    return catalog
+
+def get_catalog(database, uri=None):
+    """
+    Return the process-wide catalog for `database`, loading it on first use.
+
+    Each call stats the database file. Only when it changed is the catalog
+    generation read, and the snapshot is reloaded only if a scraper or the
+    importer has bumped the generation since it was loaded. With `uri`, the
+    queries open that SQLite URI instead of `database` (which still locates
+    the snapshot and keys the catalog).
+    """
+    signature = _file_signature(database)
+    entry = _catalogs.get(database)
+    if entry is not None and entry[1] == signature:
+        return entry[0]
+
+    with _catalogs_lock:
+        entry = _catalogs.get(database)
+        if entry is None:
+            return _load(database, signature, uri)
+        catalog = entry[0]
+        if entry[1] != signature:
+            if _database_generation(database, uri) != catalog.generation:
+                return _load(database, signature, uri)
+            _catalogs[database] = (catalog, signature)
+    return catalog
+
+def reload_catalog(database, uri=None):
+    """Rebuild the snapshot from the database now, whatever the generation says"""
+    with _catalogs_lock:
+        return _load(database, _file_signature(database), uri, use_snapshot=False)
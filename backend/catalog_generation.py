@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Catalog generation counter. The course scraper, major scraper and grade importer
+# bump it in the same transaction as their writes; the API compares it with the
+# generation its snapshot was loaded from and reloads only when it has moved.
+import sqlite3
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE = os.path.join(BASE_DIR, 'uic_courses.db')
+
+def create_generation_table(conn):
+    """Create the single-row generation table if it doesn't exist"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+
+def read_generation(cursor):
+    """Current generation, or 0 for a database that has never been bumped"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_generation'")
+    if cursor.fetchone() is None:
+        return 0
+    cursor.execute('SELECT generation FROM catalog_generation WHERE id = 1')
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def bump_generation(conn):
+    """
+    Advance the generation and return the new value. Call before the writer's
+    commit, so the counter and the rows it describes land together. Does not commit.
+    """
+    create_generation_table(conn)
+    cursor = conn.cursor()
+    cursor.execute('INSERT OR IGNORE INTO catalog_generation (id, generation) VALUES (1, 0)')
+    cursor.execute('UPDATE catalog_generation SET generation = generation + 1 WHERE id = 1')
+    return read_generation(cursor)
+
+if __name__ == '__main__':
+    # For hand edits to the database: make running APIs pick them up
+    conn = sqlite3.connect(DATABASE)
+    generation = bump_generation(conn)
+    conn.commit()
+    conn.close()
+    print(f"✓ Catalog generation is now {generation}")
@@ -0,0 +1,205 @@
+# The API's request handling, shared by the Flask app (api.py) and the Vercel
+# handlers (api/): input validation, the catalog snapshot lookups, the grade and
+# search queries, and the response caches. Both deployments only translate HTTP
+# into these calls and send back what they return:
+#   - PreparedResponse: a cacheable GET body, sent with its ETag
+#   - bytes: encoded JSON, sent as is
+#   - any other iterable: JSON pieces to stream
+# Client errors are raised as ServiceError carrying the status to answer with.
+from catalog import add_load_listener, get_catalog
+from catalog_snapshot import code_fingerprint
+from grade_report import find_course, grade_report_chunks
+from planner import parse_plan_request
+from response_cache import (LRUCache, PreparedResponse, ResponseCache, SharedFileCache, encode_json,
+                            iter_json_array, private_directory)
+from search import parse_result_limit, search_courses, search_index_exists
+
+# Eligibility results for recently seen completed sets
+ELIGIBILITY_CACHE_SIZE = 1024
+
+# Besides the catalog's own modules, the code that shapes the shared cache's
+# bodies; editing any of them starts a fresh shared cache directory
+_RESPONSE_MODULES = ('catalog_service.py',)
+
+
+class ServiceError(Exception):
+    """A request the API refuses, with the HTTP status and message to send"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _completed_codes(data):
+    completed = data.get('completed', []) if isinstance(data, dict) else None
+    if not isinstance(completed, list) or not all(isinstance(code, str) for code in completed):
+        raise ServiceError(400, 'completed must be a list of course codes')
+    return completed
+
+
+class CatalogService:
+    """
+    Endpoints over the catalog in `database`. Encoded GET responses are kept
+    per catalog version (with an optional SharedFileCache behind them, in
+    `shared_cache_dir` if it is private to this user) and warmed whenever a
+    new snapshot loads; eligibility results are kept for recently seen
+    completed sets. With `uri`, the catalog is read through that SQLite URI
+    (see catalog.get_catalog).
+    """
+
+    def __init__(self, database, shared_cache_dir=None, uri=None):
+        self.database = database
+        self.uri = uri
+        shared = None
+        if shared_cache_dir and private_directory(shared_cache_dir):
+            shared = SharedFileCache(shared_cache_dir, code_fingerprint(_RESPONSE_MODULES)[:16])
+        self.responses = ResponseCache(shared)
+        self.eligibility = LRUCache(ELIGIBILITY_CACHE_SIZE)
+        add_load_listener(self._warm)
+
+    def _warm(self, database, catalog):
+        # Every fresh snapshot has its hot responses encoded before it serves a request
+        if database == self.database:
+            self.responses.warm(catalog.version, catalog.warm_responses())
+
+    def catalog(self):
+        return get_catalog(self.database, self.uri)
+
+    def register_caches(self, metrics):
+        """Report this service's caches in a request_metrics.Metrics"""
+        metrics.register_cache('responses', self.responses.stats)
+        if self.responses.shared is not None:
+            metrics.register_cache('responses_shared', self.responses.shared.stats)
+        metrics.register_cache('eligibility', self.eligibility.stats)
+
+    def _cached(self, catalog, key, build_body):
+        return self.responses.get(catalog.version, key, build_body)
+
+    def _course_position(self, catalog, course_code):
+        pos = catalog.position(course_code)
+        if pos is None:
+            raise ServiceError(404, 'Course not found')
+        return pos
+
+    # Majors
+
+    def majors(self):
+        catalog = self.catalog()
+        return self._cached(catalog, 'majors', catalog.majors_json)
+
+    def major_requirements(self, major_id):
+        catalog = self.catalog()
+        if catalog.get_major(major_id) is None:
+            raise ServiceError(404, 'Major not found')
+        return self._cached(catalog, f'majors/{major_id}/requirements',
+                            lambda: encode_json(catalog.major_requirements(major_id)))
+
+    def major_progress(self, major_id, data):
+        """Audit of a major for the `completed` codes in a request body"""
+        result = self.catalog().major_progress(major_id, _completed_codes(data or {}))
+        if result is None:
+            raise ServiceError(404, 'Major not found')
+        return encode_json(result)
+
+    # Courses
+
+    def courses(self, args):
+        """
+        GET /api/courses with its query arguments (name -> value): the cached full
+        list, the full list streamed, a projection/filter/page, or a multi-get.
+        """
+        catalog = self.catalog()
+        if not args:
+            return self._cached(catalog, 'courses', catalog.courses_json)
+        if list(args) == ['stream'] and args['stream'] in ('1', 'true'):
+            # The full list, streamed straight from the pre-encoded courses
+            return iter_json_array(catalog.course_json)
+
+        # Projection, department filter and cursor paging: ?fields=&dept=&limit=&cursor=
+        # or a multi-get of specific courses: ?codes=CS 141,CS 151&fields=
+        try:
+            if 'codes' in args:
+                if set(args) - {'codes', 'fields'}:
+                    raise ValueError('codes can only be combined with fields')
+                body = catalog.lookup_courses_json(args['codes'], args.get('fields'))
+            else:
+                body = catalog.query_courses_json(fields=args.get('fields'), dept=args.get('dept'),
+                                                  limit=args.get('limit'), cursor=args.get('cursor'))
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+        return PreparedResponse(body)
+
+    def lookup_courses(self, data):
+        """POST /api/courses: a multi-get for code lists too long for a query string"""
+        if not isinstance(data, dict):
+            raise ServiceError(400, 'Request body must be a JSON object')
+        try:
+            return self.catalog().lookup_courses_json(data.get('codes', []), data.get('fields'))
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+
+    def course(self, course_code):
+        catalog = self.catalog()
+        course_code = course_code.upper()
+        pos = self._course_position(catalog, course_code)
+        return self._cached(catalog, f'courses/{course_code}', lambda: catalog.course_json[pos])
+
+    def prerequisite_tree(self, course_code):
+        catalog = self.catalog()
+        course_code = course_code.upper()
+        self._course_position(catalog, course_code)
+        return self._cached(catalog, f'courses/{course_code}/prereq-tree',
+                            lambda: encode_json(catalog.prerequisite_tree(course_code)))
+
+    def unlocks(self, course_code):
+        catalog = self.catalog()
+        course_code = course_code.upper()
+        self._course_position(catalog, course_code)
+        return self._cached(catalog, f'courses/{course_code}/unlocks',
+                            lambda: encode_json(catalog.unlocks(course_code)))
+
+    def eligible(self, data):
+        """Encoded eligible-course list for a request body, and whether it came from the cache"""
+        completed = _completed_codes(data)
+        catalog = self.catalog()
+        return self.eligibility.get(catalog.version, catalog.eligibility.canonical_key(completed),
+                                    lambda: catalog.eligible_courses_json(completed))
+
+    def plan(self, data):
+        try:
+            completed, targets, major_id, credit_cap, max_terms = parse_plan_request(data)
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+
+        catalog = self.catalog()
+        if major_id is not None and catalog.get_major(major_id) is None:
+            raise ServiceError(404, 'Major not found')
+        return encode_json(catalog.plan(completed, targets, major_id, credit_cap, max_terms))
+
+    # Queries that need a connection: `conn` is the caller's, so each deployment
+    # keeps its own connection handling
+
+    def search(self, conn, query, limit=None):
+        query = (query or '').strip()
+        if not query:
+            raise ServiceError(400, 'Missing search query')
+        try:
+            limit = parse_result_limit(limit)
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+
+        if not search_index_exists(conn.cursor()):
+            raise ServiceError(503, 'Search index not built. Run search.py first.')
+        return PreparedResponse(encode_json({'query': query, 'results': search_courses(conn, query, limit)}))
+
+    def grade_report(self, conn, course_code, stream=False):
+        """A course's grade report, whole or (with `stream`) as pieces read from the cursor"""
+        cursor = conn.cursor()
+        course = find_course(cursor, course_code.upper())
+        if course is None:
+            raise ServiceError(404, 'Course not found')
+
+        chunks = grade_report_chunks(cursor, course)
+        if stream:
+            return chunks
+        return PreparedResponse(b''.join(chunks))
@@ -0,0 +1,146 @@
+# Prebuilt catalog snapshots: the fully built Catalog (course payloads, grouped
+# prerequisites, grade-derived fields, major requirements and the engines built
+# on them) pickled into one file next to the database, so a cold process loads
+# it with a single read instead of querying SQLite and rebuilding everything.
+#
+#   python catalog_snapshot.py [database] [output]
+#
+# The file starts with a JSON header line. A snapshot is only used when its
+# header matches the database file it was built from, the database's catalog
+# generation and the code that defines the pickled classes; otherwise the
+# catalog is loaded from the database as usual.
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+
+MAGIC = b'COURSESCOPE-SNAPSHOT\n'
+FORMAT = 2
+
+# Modules whose classes end up in the pickle; editing any of them retires old snapshots
+_PICKLED_MODULES = ('catalog.py', 'eligibility.py', 'prereq_graph.py', 'planner.py', 'degree_progress.py',
+                    'course_derived.py', 'grade_rollups.py', 'response_cache.py')
+_code_fingerprints = {}
+
+def code_fingerprint(extra_modules=()):
+    """Hash of the pickled modules' source, plus that of `extra_modules` (file names in backend/)"""
+    fingerprint = _code_fingerprints.get(extra_modules)
+    if fingerprint is None:
+        digest = hashlib.sha1()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in _PICKLED_MODULES + tuple(extra_modules):
+            with open(os.path.join(base_dir, name), 'rb') as f:
+                digest.update(f.read())
+        fingerprint = _code_fingerprints[extra_modules] = digest.hexdigest()
+    return fingerprint
+
+def snapshot_path(database):
+    """Where the snapshot for `database` lives: uic_courses.db -> uic_courses.snapshot"""
+    return os.path.splitext(database)[0] + '.snapshot'
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def database_fingerprint(database):
+    """Size, mtime and content hash of a database file, recorded in snapshot headers"""
+    stat = os.stat(database)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha1': _file_sha1(database)}
+
+def _same_database(fingerprint, database):
+    # Same size and mtime: the file the snapshot was built from. A deployed copy
+    # gets a new mtime, so then its contents decide.
+    if not isinstance(fingerprint, dict):
+        return False
+    try:
+        stat = os.stat(database)
+        if stat.st_size != fingerprint.get('size'):
+            return False
+        return stat.st_mtime_ns == fingerprint.get('mtime') or _file_sha1(database) == fingerprint.get('sha1')
+    except OSError:
+        return False
+
+def write_snapshot(catalog, path, database):
+    """
+    Write `catalog` to `path` atomically. `database` is the database_fingerprint()
+    of its database, taken before the catalog was loaded. Returns the header.
+    """
+    header = {
+        'format': FORMAT,
+        'code': code_fingerprint(),
+        'database': database,
+        'version': catalog.version,
+        'generation': catalog.generation,
+        'courses': len(catalog)
+    }
+    payload = pickle.dumps(catalog, protocol=pickle.HIGHEST_PROTOCOL)
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            f.write(payload)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return header
+
+def read_snapshot(path, database, generation):
+    """
+    The Catalog stored at `path` for `database`, or None if there is no
+    snapshot, it was built from another database file, for another catalog
+    generation or by another version of the code, or it can't be unpickled
+    (e.g. a truncated file).
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    if not data.startswith(MAGIC):
+        return None
+    end = data.find(b'\n', len(MAGIC))
+    try:
+        header = json.loads(data[len(MAGIC):end])
+    except ValueError:
+        return None
+    if (header.get('format') != FORMAT or header.get('code') != code_fingerprint() or
+            header.get('generation') != generation or
+            not _same_database(header.get('database'), database)):
+        print(f"Catalog snapshot {path} is out of date; loading from the database "
+              f"(rebuild it with catalog_snapshot.py)", file=sys.stderr)
+        return None
+    try:
+        return pickle.loads(memoryview(data)[end + 1:])
+    except Exception as e:
+        print(f"Catalog snapshot {path} could not be read ({type(e).__name__}: {e}); "
+              f"loading from the database", file=sys.stderr)
+        return None
+
+def build_snapshot(database, path=None):
+    """Load the catalog from `database` and write its snapshot. Returns the header."""
+    # Imported here: catalog reads snapshots through this module
+    from catalog import load_catalog
+    fingerprint = database_fingerprint(database)
+    return write_snapshot(load_catalog(database), path or snapshot_path(database), fingerprint)
+
+
+if __name__ == '__main__':
+    database = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                  'uic_courses.db')
+    output = sys.argv[2] if len(sys.argv) > 2 else snapshot_path(database)
+    if not os.path.exists(database):
+        print(f"ERROR: Database file '{database}' not found!")
+        sys.exit(1)
+
+    header = build_snapshot(database, output)
+    print(f"Wrote {output}: {header['courses']} courses, catalog version {header['version'][:12]}, "
+          f"generation {header['generation']}, {os.path.getsize(output) // 1024} KB")
@@ -0,0 +1,125 @@
+# Load comparison of the WSGI and ASGI serving paths, run in-process so no
+# server or network is involved. A burst of slow planner requests arrives
+# together with cheap /api/majors requests:
+#   - WSGI: one FIFO thread pool calls the Flask app, as a threaded gunicorn worker does
+#   - ASGI: asgi.app with its separate light and heavy pools and bounded queues
+# Reports latency percentiles per request kind, and how many requests ASGI turned away.
+#
+#   python compare_serving.py [heavy requests] [light requests]
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import asgi
+from catalog import get_catalog
+from api import DATABASE
+
+# The WSGI baseline gets as many threads as both ASGI pools together
+WSGI_THREADS = asgi.LIGHT_WORKERS + asgi.HEAVY_WORKERS
+
+def make_requests(heavy_count, light_count):
+    """(kind, method, path, body) in arrival order, the light ones spread through the burst"""
+    catalog = get_catalog(DATABASE)
+    # Planning towards every course keeps the planner busy for several milliseconds
+    plan_body = json.dumps({'targets': [course['code'] for course in catalog.courses]}).encode('utf-8')
+
+    heavy = ('heavy', 'POST', '/api/plan', plan_body)
+    light = ('light', 'GET', '/api/majors', b'')
+    total = heavy_count + light_count
+    requests = []
+    lights = 0
+    for i in range(total):
+        if lights < (i + 1) * light_count // total:
+            requests.append(light)
+            lights += 1
+        else:
+            requests.append(heavy)
+    return requests
+
+def scope_for(method, path):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'http_version': '1.1',
+        'headers': [(b'content-type', b'application/json')]
+    }
+
+def run_wsgi(requests):
+    """Latencies per kind with every request queued on one thread pool"""
+    def call(method, path, body):
+        statuses = []
+        result = asgi.flask_app(asgi._wsgi_environ(scope_for(method, path), body),
+                                lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(result)
+        asgi._close_wsgi(result)
+        return int(statuses[0].split(' ', 1)[0])
+
+    latencies = {'heavy': [], 'light': []}
+    statuses = []
+    with ThreadPoolExecutor(max_workers=WSGI_THREADS) as executor:
+        started = time.perf_counter()
+        futures = []
+        for kind, method, path, body in requests:
+            future = executor.submit(call, method, path, body)
+            future.add_done_callback(lambda f, kind=kind: latencies[kind].append(time.perf_counter() - started))
+            futures.append(future)
+        statuses = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+def run_asgi(requests):
+    """Latencies per kind with every request handed to asgi.app at once"""
+    async def call(kind, method, path, body, started, latencies):
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = []
+
+        async def receive():
+            return messages.pop() if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await asgi.app(scope_for(method, path), receive, send)
+        latencies[kind].append(time.perf_counter() - started)
+        return status[0]
+
+    async def burst():
+        latencies = {'heavy': [], 'light': []}
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(call(*request, started, latencies) for request in requests))
+        return latencies, statuses, time.perf_counter() - started
+
+    return asyncio.run(burst())
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def report(name, result):
+    latencies, statuses, elapsed = result
+    print(f"\n{name}: {len(statuses)} requests in {elapsed * 1000:.0f} ms, "
+          f"{statuses.count(503)} rejected with 503")
+    for kind in ('light', 'heavy'):
+        values = latencies[kind]
+        print(f"  {kind:5}  p50 {percentile(values, 0.5) * 1000:7.1f} ms   "
+              f"p95 {percentile(values, 0.95) * 1000:7.1f} ms   "
+              f"max {max(values, default=0) * 1000:7.1f} ms")
+
+if __name__ == '__main__':
+    heavy_count = int(sys.argv[1]) if len(sys.argv) > 1 else asgi.HEAVY_MAX_PENDING
+    light_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    requests = make_requests(heavy_count, light_count)
+
+    # One untimed pass so both paths run against a loaded catalog and warm caches
+    run_wsgi(requests[:10])
+
+    print(f"{heavy_count} planner requests + {light_count} /api/majors requests, arriving together")
+    report(f"WSGI ({WSGI_THREADS} threads, one queue)", run_wsgi(requests))
+    report(f"ASGI ({asgi.LIGHT_WORKERS} light + {asgi.HEAVY_WORKERS} heavy threads)", run_asgi(requests))
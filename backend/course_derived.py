@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Derived per-course values (slug, normalized credits, A+B ratio, final difficulty).
+# The course scraper and the grade importer write these to the course_derived
+# table whenever they change the underlying rows, so the API only reads them back.
+import sqlite3
+import os
+import re
+
+from catalog_generation import bump_generation
+from grade_rollups import letter_grade_totals
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE = os.path.join(BASE_DIR, 'uic_courses.db')
+
+def parse_credits(credits_str):
+    """Parse credits string and extract numeric value"""
+    if not credits_str:
+        return 3
+    # Extract first number from string like "3 hours" or "3-4 hours"
+    match = re.search(r'(\d+)', credits_str)
+    return int(match.group(1)) if match else 3
+
+def estimate_difficulty(level):
+    """Estimate difficulty based on course level"""
+    if level <= 200:
+        return "Light"
+    elif level <= 300:
+        return "Moderate"
+    else:
+        return "Challenging"
+
+def course_slug(course_code):
+    """Frontend id for a course, e.g. 'CS 141' -> 'cs141'"""
+    return course_code.lower().replace(' ', '')
+
+def ab_ratio_from_totals(total_a, total_b, total_c, total_d, total_f):
+    """Share of A and B grades among letter grades (W, S, U excluded), or None"""
+    total_letter = total_a + total_b + total_c + total_d + total_f
+    if total_letter == 0:
+        return None
+    return (total_a + total_b) / total_letter
+
+def difficulty_from_ab_ratio(ab_ratio):
+    """
+    Map an A+B ratio to a difficulty tier.
+
+    Criteria:
+    - Light: A+B >= 70%
+    - Moderate: 50% <= A+B < 70%
+    - Challenging: A+B < 50%
+    """
+    if ab_ratio is None:
+        return None
+
+    ab_pct = ab_ratio * 100
+    if ab_pct >= 70:
+        return "Light"
+    elif ab_pct >= 50:
+        return "Moderate"
+    else:
+        return "Challenging"
+
+def derive_course(course, grade_totals):
+    """
+    Compute the derived values for one course row.
+
+    `course` needs course_code, credits, credits_undergrad, credits_grad, level
+    and difficulty; `grade_totals` is (A, B, C, D, F) or None.
+    """
+    ab_ratio = ab_ratio_from_totals(*grade_totals) if grade_totals else None
+
+    # Use grade data if available, otherwise the scraped or level-based estimate
+    difficulty = difficulty_from_ab_ratio(ab_ratio)
+    if difficulty is None:
+        difficulty = course['difficulty'] or estimate_difficulty(course['level'])
+
+    return {
+        'slug': course_slug(course['course_code']),
+        'credits_undergrad': course['credits_undergrad'] or parse_credits(course['credits']),
+        'credits_grad': course['credits_grad'] or parse_credits(course['credits']),
+        'ab_ratio': ab_ratio,
+        'difficulty': difficulty
+    }
+
+def create_derived_table(conn):
+    """Create the course_derived table if it doesn't exist"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS course_derived (
+            course_code TEXT PRIMARY KEY,
+            slug TEXT NOT NULL,
+            credits_undergrad INTEGER NOT NULL,
+            credits_grad INTEGER NOT NULL,
+            ab_ratio REAL,
+            difficulty TEXT NOT NULL
+        )
+    ''')
+
+def _chunks(items, size=500):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def refresh_course_derived(conn, course_codes=None):
+    """
+    Recompute course_derived rows for `course_codes`, or for every course when None.
+    Codes that aren't in the courses table are ignored. Does not commit.
+    """
+    cursor = conn.cursor()
+    create_derived_table(conn)
+
+    if course_codes is None:
+        cursor.execute('DELETE FROM course_derived WHERE course_code NOT IN (SELECT course_code FROM courses)')
+        cursor.execute('SELECT course_code FROM courses')
+        course_codes = [row[0] for row in cursor.fetchall()]
+    else:
+        course_codes = sorted(set(course_codes))
+
+    refreshed = 0
+    for chunk in _chunks(course_codes):
+        placeholders = ','.join('?' * len(chunk))
+
+        cursor.execute(f'''
+            SELECT course_code, credits, credits_undergrad, credits_grad, level, difficulty
+            FROM courses
+            WHERE course_code IN ({placeholders})
+        ''', chunk)
+        courses = cursor.fetchall()
+
+        grade_totals = letter_grade_totals(cursor, chunk)
+
+        rows = []
+        for code, credits, credits_undergrad, credits_grad, level, difficulty in courses:
+            derived = derive_course({
+                'course_code': code,
+                'credits': credits,
+                'credits_undergrad': credits_undergrad,
+                'credits_grad': credits_grad,
+                'level': level,
+                'difficulty': difficulty
+            }, grade_totals.get(code))
+            rows.append((code, derived['slug'], derived['credits_undergrad'], derived['credits_grad'],
+                         derived['ab_ratio'], derived['difficulty']))
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO course_derived
+            (course_code, slug, credits_undergrad, credits_grad, ab_ratio, difficulty)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        refreshed += len(rows)
+
+    return refreshed
+
+if __name__ == '__main__':
+    # Backfill an existing database
+    conn = sqlite3.connect(DATABASE)
+    count = refresh_course_derived(conn)
+    # So running APIs reload their catalog
+    bump_generation(conn)
+    conn.commit()
+    conn.close()
+    print(f"✓ Refreshed derived values for {count} courses")
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from urllib.request import pathname2url
+
+import sql_trace
+
+# Applied once per connection. The API never writes, so connections are
+# opened read-only and sized for serving rather than for the scrapers.
+SERVING_PRAGMAS = (
+    'PRAGMA query_only = ON',
+    'PRAGMA mmap_size = 268435456',  # 256 MB memory-mapped reads
+    'PRAGMA cache_size = -16000',    # ~16 MB page cache
+    'PRAGMA temp_store = MEMORY',
+)
+
+# sqlite3 keeps this many prepared statements per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# serving_path(policy='auto') copies the database when a sample read of this
+# many bytes runs slower than SLOW_READ_BYTES_PER_SECOND
+PROBE_BYTES = 4 * 1024 * 1024
+SLOW_READ_BYTES_PER_SECOND = 50 * 1024 * 1024
+
+
+class ReadOnlyConnections:
+    """
+    Per-thread persistent read-only connections to one database.
+
+    Each worker thread opens its connection on first use and keeps it, so the
+    connect, PRAGMA setup and page-cache warm-up are paid once per thread
+    instead of once per query. Every statement run on a connection is counted
+    for the current request (see `start_request` / `query_count`).
+    """
+
+    def __init__(self, database, immutable=False):
+        self.database = database
+        # immutable=1 tells SQLite the file can't change while it is open, so it
+        # skips locking and change detection on every query. Only for files
+        # nothing writes to, such as a deployment bundle; an uncheckpointed WAL
+        # would be ignored, so a database with one is opened normally.
+        self.immutable = immutable and not os.path.exists(database + '-wal')
+        # Also handed to the catalog loader, so it reads the same file the same way
+        self.uri = 'file:' + pathname2url(database) + ('?mode=ro&immutable=1' if self.immutable else '?mode=ro')
+        self._local = threading.local()
+
+    def get(self):
+        """Return this thread's connection, opening it on first use. Don't close it."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE,
+                                   factory=sql_trace.connection_factory())
+            conn.row_factory = sqlite3.Row
+            for pragma in SERVING_PRAGMAS:
+                conn.execute(pragma)
+            conn.set_trace_callback(self._count_statement)
+            self._local.conn = conn
+            self._local.query_count = 0
+        return conn
+
+    def _count_statement(self, statement):
+        # Trace callbacks run on the thread that executes the statement. Statements
+        # SQLite runs internally (FTS5 lookups, triggers) arrive prefixed with '-- '.
+        if statement.startswith('-- '):
+            return
+        self._local.query_count = getattr(self._local, 'query_count', 0) + 1
+
+    def start_request(self):
+        """Reset this thread's statement counter"""
+        self._local.query_count = 0
+
+    def query_count(self):
+        """Statements run on this thread since `start_request`"""
+        return getattr(self._local, 'query_count', 0)
+
+    def close(self):
+        """Close this thread's connection (the next `get` reopens it)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _read_rate(path):
+    # Bytes per second for reading the start of the file
+    started = time.perf_counter()
+    with open(path, 'rb', buffering=0) as f:
+        size = len(f.read(PROBE_BYTES))
+    elapsed = time.perf_counter() - started
+    return size / elapsed if elapsed > 0 else float('inf')
+
+def serving_path(database, policy='auto', directory=None):
+    """
+    The path to serve a read-only `database` from: the file itself, or a copy in
+    `directory` (the temp directory by default) when `policy` is 'always', or
+    'auto' and reading the original is slow. A copy of the same file (path,
+    size and mtime) left by an earlier start is reused. If copying fails, the
+    original is served.
+    """
+    if policy == 'never' or (policy == 'auto' and _read_rate(database) >= SLOW_READ_BYTES_PER_SECOND):
+        return database
+
+    stat = os.stat(database)
+    key = f'{os.path.abspath(database)}:{stat.st_size}:{stat.st_mtime_ns}'
+    directory = directory or tempfile.gettempdir()
+    copy = os.path.join(directory, f'coursescope-{hashlib.sha1(key.encode()).hexdigest()[:16]}.db')
+    if os.path.exists(copy) and os.path.getsize(copy) == stat.st_size:
+        return copy
+
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as target, open(database, 'rb') as source:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(temp_path, copy)
+    except OSError as e:
+        print(f"Could not copy {database} to {directory} ({e}); serving it in place", file=sys.stderr)
+        if temp_path is not None and os.path.exists(temp_path):
+            os.unlink(temp_path)
+        return database
+    return copy
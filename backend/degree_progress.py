@@ -0,0 +1,79 @@
+from eligibility import iter_positions, mask_from_positions
+
+
+class DegreeProgress:
+    """
+    Degree-progress audits over precomputed requirement bitsets.
+
+    For every major, each requirement type and elective type is compiled into a
+    bitset over catalog positions when the catalog loads. An audit turns the
+    completed set into one bitset and then answers every category with an AND
+    (satisfied) and an AND-NOT (remaining). Requirements naming courses that
+    aren't in the catalog are skipped, as they are in the requirements payload.
+    """
+
+    def __init__(self, courses, index, requirements, electives, eligibility, planner):
+        self._courses = courses
+        self._eligibility = eligibility
+        self._planner = planner
+        self._credits = [course['creditsUndergrad'] for course in courses]
+
+        self._required = {
+            major_id: self._compile(rows, index, len(courses))
+            for major_id, rows in requirements.items()
+        }
+        self._electives = {
+            major_id: self._compile(rows, index, len(courses))
+            for major_id, rows in electives.items()
+        }
+
+    @staticmethod
+    def _compile(rows, index, size):
+        # (course_code, type) rows -> ((type, bitset), ...) in first-seen type order
+        positions = {}
+        for course_code, category in rows:
+            pos = index.get(course_code)
+            if pos is not None:
+                positions.setdefault(category, []).append(pos)
+        return tuple((category, mask_from_positions(found, size)) for category, found in positions.items())
+
+    def _codes(self, mask):
+        return [self._courses[pos]['code'] for pos in iter_positions(mask)]
+
+    def _categories(self, compiled, done):
+        result = []
+        for category, mask in compiled:
+            satisfied = mask & done
+            remaining = mask & ~done
+            result.append({
+                'type': category,
+                'satisfied': self._codes(satisfied),
+                'remaining': self._codes(remaining),
+                'satisfiedCount': bin(satisfied).count('1'),
+                'total': bin(mask).count('1')
+            })
+        return result
+
+    def audit(self, major_id, completed_codes):
+        """
+        Progress of `completed_codes` through a major: satisfied and remaining
+        courses per requirement and elective type, credits still required, and
+        the shortest number of terms the remaining prerequisite chain allows.
+        """
+        completed = set(completed_codes)
+        done = self._eligibility.completed_mask(completed)
+        required = self._required.get(major_id, ())
+
+        remaining_required = 0
+        for _, mask in required:
+            remaining_required |= mask & ~done
+        remaining_positions = list(iter_positions(remaining_required))
+
+        return {
+            'requirements': self._categories(required, done),
+            'electives': self._categories(self._electives.get(major_id, ()), done),
+            'remainingCourses': len(remaining_positions),
+            'remainingCredits': sum(self._credits[pos] for pos in remaining_positions),
+            'shortestRemainingChain': self._planner.critical_path_length(
+                completed, [self._courses[pos]['code'] for pos in remaining_positions])
+        }
@@ -0,0 +1,91 @@
+import hashlib
+from collections import defaultdict
+
+def mask_from_positions(positions, size):
+    """Build an integer bitset with the given bit positions set"""
+    buf = bytearray((size + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, 'little')
+
+def iter_positions(mask):
+    """Yield the set bit positions of an integer bitset in ascending order"""
+    bits = bin(mask)[:1:-1]  # Least significant bit first, without the '0b' prefix
+    pos = bits.find('1')
+    while pos != -1:
+        yield pos
+        pos = bits.find('1', pos + 1)
+
+
+class EligibilityEngine:
+    """
+    Prerequisite checker compiled from the catalog's AND-of-OR groups.
+
+    Every course with prerequisites gets a group bitmask (bit j set = group j),
+    and every prerequisite code gets a posting list of the (course, group bit)
+    pairs it satisfies. Evaluating a completed set ORs together the postings of
+    the completed codes only, so the cost depends on how many courses the
+    student's courses unlock rather than on the size of the catalog. The result
+    is a bitset over catalog positions.
+    """
+
+    def __init__(self, courses, index):
+        self.size = len(courses)
+        self._index = index
+
+        postings = defaultdict(list)
+        full_masks = [0] * self.size
+        free = []
+        for pos, course in enumerate(courses):
+            groups = course['prerequisiteGroups']
+            if not groups:
+                free.append(pos)
+                continue
+
+            full_masks[pos] = (1 << len(groups)) - 1
+            for group_num, group in enumerate(groups):
+                group_bit = 1 << group_num
+                for code in group:
+                    postings[code].append((pos, group_bit))
+
+        self._postings = {code: tuple(items) for code, items in postings.items()}
+        self._full_masks = full_masks
+        # Courses without prerequisites are always eligible
+        self._free_mask = mask_from_positions(free, self.size)
+
+    def canonical_key(self, completed_codes):
+        """
+        Order-insensitive cache key for a completed set. Codes that are neither
+        catalog courses nor anyone's prerequisite can't change the result, so
+        they are left out.
+        """
+        relevant = sorted(code for code in set(completed_codes)
+                          if code in self._postings or code in self._index)
+        return hashlib.sha1('\x1f'.join(relevant).encode('utf-8')).hexdigest()
+
+    def completed_mask(self, completed_codes):
+        """Bitset of catalog positions for the completed codes that are in the catalog"""
+        positions = [self._index[code] for code in completed_codes if code in self._index]
+        return mask_from_positions(positions, self.size)
+
+    def eligible_mask(self, completed_codes):
+        """
+        Bitset of catalog positions whose prerequisites are met by `completed_codes`
+        (a set), excluding the completed courses themselves.
+        """
+        satisfied = {}
+        postings = self._postings
+        for code in completed_codes:
+            for pos, group_bit in postings.get(code, ()):
+                satisfied[pos] = satisfied.get(pos, 0) | group_bit
+
+        full_masks = self._full_masks
+        unlocked = [pos for pos, bits in satisfied.items() if bits == full_masks[pos]]
+
+        mask = self._free_mask | mask_from_positions(unlocked, self.size)
+        return mask & ~self.completed_mask(completed_codes)
+
+    def eligible_positions(self, completed_codes):
+        """Catalog positions of the eligible courses, in catalog order"""
+        return list(iter_positions(self.eligible_mask(completed_codes)))
+
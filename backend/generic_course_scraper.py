@@ -3,6 +3,10 @@ from bs4 import BeautifulSoup
 import sqlite3
 import re
 
+from course_derived import refresh_course_derived
+from search import refresh_search_index
+from catalog_generation import bump_generation
+
 def estimate_difficulty(level, prereq_count, credits_num, description):
     """
     Estimate difficulty based on multiple factors:
@@ -289,6 +293,16 @@ def insert_courses(conn, courses):
         except sqlite3.IntegrityError as e:
             print(f"Error inserting course: {course['course_code']} - {e}")
 
+    # Recompute slug, credits and difficulty for the courses we just wrote
+    course_codes = [course['course_code'] for course in courses]
+    refresh_course_derived(conn, course_codes)
+
+    # Keep the full-text search index in step with the rows we just wrote
+    refresh_search_index(conn, course_codes)
+
+    # Tell running APIs their catalog snapshot is out of date
+    bump_generation(conn)
+
     conn.commit()
     print(f"\n✓ Inserted {inserted_count} new courses, updated {updated_count} existing courses!")
 
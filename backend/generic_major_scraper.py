@@ -3,6 +3,8 @@ from bs4 import BeautifulSoup
 import sqlite3
 import re
 
+from catalog_generation import bump_generation
+
 # Configuration for different majors
 MAJOR_CONFIGS = {
     'CS': {
@@ -235,6 +237,9 @@ def insert_major_requirements(conn, requirements, electives, major_name, concent
             except sqlite3.IntegrityError:
                 print(f"Duplicate elective: {course_code}")
 
+    # Tell running APIs their catalog snapshot is out of date
+    bump_generation(conn)
+
     conn.commit()
     print(f"\n✓ Successfully inserted {total_courses} required courses and {total_electives} electives!")
 
@@ -4,6 +4,10 @@ import os
 import re
 from pathlib import Path
 
+from course_derived import refresh_course_derived
+from grade_rollups import refresh_grade_rollups
+from catalog_generation import bump_generation
+
 def create_grade_tables():
     """Create tables for grade distributions"""
     conn = sqlite3.connect('uic_courses.db')
@@ -97,6 +101,7 @@ def import_grade_csv(conn, csv_path):
     
     imported_count = 0
     skipped_count = 0
+    imported_codes = set()
     
     with open(csv_path, 'r', encoding='utf-8-sig') as f:
         reader = csv.DictReader(f)
@@ -146,6 +151,7 @@ def import_grade_csv(conn, csv_path):
                       grade_d, grade_f, grade_w, grade_s, grade_u, total_students))
                 
                 imported_count += 1
+                imported_codes.add(course_code)
                 
                 if imported_count <= 5:  # Show first 5 for verification
                     print(f"  ✓ {course_code} - {instructor}: A={grade_a}, B={grade_b}, C={grade_c}, Total={total_students}")
@@ -155,6 +161,12 @@ def import_grade_csv(conn, csv_path):
                 skipped_count += 1
                 continue
     
+    # Roll up the new sections, recompute grade-based difficulty from the rollups,
+    # and bump the generation so running APIs reload their catalog
+    refresh_grade_rollups(conn, imported_codes)
+    refresh_course_derived(conn, imported_codes)
+    bump_generation(conn)
+    
     conn.commit()
     print(f"\n✓ Imported {imported_count} grade distributions")
     if skipped_count > 0:
@@ -0,0 +1,112 @@
+# Grade distribution report for one course (the /api/courses/<code>/grades payload).
+# The report is produced as encoded JSON chunks while the section rows are read,
+# so a course with many semesters never holds every row, dict and string at once.
+from itertools import chain
+
+from response_cache import encode_json
+
+GRADE_KEYS = ('A', 'B', 'C', 'D', 'F', 'W', 'S', 'U')
+
+def find_course(cursor, course_code):
+    """Return the (id, course_code, title) row for an exact course code, or None"""
+    cursor.execute('''
+        SELECT id, course_code, title
+        FROM courses
+        WHERE course_code = ?
+    ''', (course_code,))
+    return cursor.fetchone()
+
+def _percentages(counts, total_students):
+    # Letter grades as a share of A-F, withdrawals as a share of everyone
+    letter_total = sum(counts[:5])
+    percentages = {
+        key: round((count / letter_total * 100), 1) if letter_total > 0 else 0
+        for key, count in zip(GRADE_KEYS[:5], counts[:5])
+    }
+    percentages['W'] = round((counts[5] / total_students * 100), 1) if total_students > 0 else 0
+    return percentages
+
+def format_distribution(row):
+    """One section row (instructor, term, year, A..U, total) as its JSON dict"""
+    instructor, term, year = row[0], row[1], row[2]
+    counts = tuple(row[3:11])
+    total = row[11]
+    return {
+        'instructor': instructor,
+        'semester': f"{term} {year}",
+        'term': term,
+        'year': year,
+        'grades': dict(zip(GRADE_KEYS, counts)),
+        'percentages': _percentages(counts, total),
+        'total_students': total
+    }
+
+def grade_report_chunks(cursor, course):
+    """
+    Run the distribution query for `course` (a find_course row) and return an
+    iterator of encoded JSON chunks that together form the report. Sections are
+    encoded one at a time; the average is written last, once every row is counted.
+    """
+    cursor.execute('''
+        SELECT
+            gd.instructor,
+            s.term,
+            s.year,
+            gd.grade_a,
+            gd.grade_b,
+            gd.grade_c,
+            gd.grade_d,
+            gd.grade_f,
+            gd.grade_w,
+            gd.grade_s,
+            gd.grade_u,
+            gd.total_students
+        FROM grade_distributions gd
+        JOIN semesters s ON gd.semester_id = s.id
+        WHERE gd.course_code = ?
+        ORDER BY s.year DESC, s.term, gd.instructor
+    ''', (course['course_code'],))
+
+    first = cursor.fetchone()
+    if first is None:
+        return iter([encode_json({
+            'course_code': course['course_code'],
+            'course_title': course['title'],
+            'has_data': False,
+            'message': 'No grade distribution data available for this course',
+            'distributions': [],
+            'average': None
+        })])
+
+    return _iter_report(cursor, course, first)
+
+def _iter_report(cursor, course, first):
+    # Open the object and its distributions array; the header dict minus its closing brace
+    header = encode_json({
+        'course_code': course['course_code'],
+        'course_title': course['title'],
+        'has_data': True
+    })
+    yield header[:-1] + b',"distributions":['
+
+    totals = [0] * len(GRADE_KEYS)
+    total_students = 0
+    count = 0
+    for row in chain((first,), cursor):
+        if count:
+            yield b','
+        yield encode_json(format_distribution(row))
+
+        # Accumulate for average
+        for i, value in enumerate(row[3:11]):
+            totals[i] += value
+        total_students += row[11]
+        count += 1
+
+    average = {
+        'grades': dict(zip(GRADE_KEYS, totals)),
+        'percentages': _percentages(totals, total_students),
+        'total_students': total_students,
+        'semesters_count': count
+    }
+    yield b'],"average":' + encode_json(average) + b'}'
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Grade distribution rollups: totals per course, per course and semester, and per
+# course and instructor. The grade importer refreshes the rows of every course in
+# a CSV after loading it, so readers never aggregate grade_distributions themselves.
+import sqlite3
+import os
+
+from catalog_generation import bump_generation
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE = os.path.join(BASE_DIR, 'uic_courses.db')
+
+GRADE_COLUMNS = ('grade_a', 'grade_b', 'grade_c', 'grade_d', 'grade_f',
+                 'grade_w', 'grade_s', 'grade_u', 'total_students')
+
+# Rollup table -> the grade_distributions columns it groups by (besides course_code)
+ROLLUPS = {
+    'grade_rollup_course': (),
+    'grade_rollup_semester': ('semester_id',),
+    'grade_rollup_instructor': ('instructor',)
+}
+
+_SUMS = ', '.join(f'COALESCE(SUM({column}), 0)' for column in GRADE_COLUMNS)
+
+def create_rollup_tables(conn):
+    """Create the rollup tables if they don't exist"""
+    counts = ',\n'.join(f'            {column} INTEGER NOT NULL DEFAULT 0' for column in GRADE_COLUMNS)
+    key_types = {'semester_id': 'INTEGER NOT NULL', 'instructor': 'TEXT NOT NULL'}
+
+    for table, keys in ROLLUPS.items():
+        key_columns = ''.join(f'            {key} {key_types[key]},\n' for key in keys)
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+            course_code TEXT NOT NULL,
+{key_columns}{counts},
+            section_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (course_code{''.join(', ' + key for key in keys)})
+        )
+        ''')
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+def _chunks(items, size=500):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def refresh_grade_rollups(conn, course_codes=None):
+    """
+    Recompute the rollup rows for `course_codes`, or rebuild every rollup when
+    None. Only the sections of those courses are read. Does not commit.
+
+    The first refresh on a database always rebuilds everything: readers trust
+    the rollup tables once they exist, so they must never hold only some courses.
+    """
+    cursor = conn.cursor()
+    if not all(_table_exists(cursor, table) for table in ROLLUPS):
+        course_codes = None
+    create_rollup_tables(conn)
+
+    if course_codes is None:
+        for table in ROLLUPS:
+            cursor.execute(f'DELETE FROM {table}')
+        chunks = [None]
+    else:
+        chunks = list(_chunks(sorted(set(course_codes))))
+
+    for chunk in chunks:
+        if chunk is None:
+            where, params = '', ()
+        else:
+            where = f"WHERE course_code IN ({','.join('?' * len(chunk))})"
+            params = chunk
+
+        for table, keys in ROLLUPS.items():
+            group_by = ', '.join(('course_code',) + keys)
+            # Sections without an instructor roll up under ''
+            selected = group_by.replace('instructor', "COALESCE(instructor, '')")
+            if chunk is not None:
+                cursor.execute(f'DELETE FROM {table} {where}', params)
+            cursor.execute(f'''
+                INSERT INTO {table} ({group_by}, {', '.join(GRADE_COLUMNS)}, section_count)
+                SELECT {selected}, {_SUMS}, COUNT(*)
+                FROM grade_distributions
+                {where}
+                GROUP BY {selected}
+            ''', params)
+
+    cursor.execute('SELECT COUNT(*) FROM grade_rollup_course')
+    return cursor.fetchone()[0]
+
+def letter_grade_totals(cursor, course_codes=None):
+    """
+    {course_code: (A, B, C, D, F)} for `course_codes`, or for every course with
+    grade data when None. Reads grade_rollup_course, falling back to aggregating
+    grade_distributions on databases that predate the rollups.
+    """
+    if _table_exists(cursor, 'grade_rollup_course'):
+        source = 'SELECT course_code, grade_a, grade_b, grade_c, grade_d, grade_f FROM grade_rollup_course'
+        group_by = ''
+    elif _table_exists(cursor, 'grade_distributions'):
+        source = ('SELECT course_code, SUM(grade_a), SUM(grade_b), SUM(grade_c), SUM(grade_d), SUM(grade_f) '
+                  'FROM grade_distributions')
+        group_by = ' GROUP BY course_code'
+    else:
+        return {}
+
+    totals = {}
+    if course_codes is None:
+        cursor.execute(source + group_by)
+        rows = cursor.fetchall()
+    else:
+        rows = []
+        for chunk in _chunks(sorted(set(course_codes))):
+            cursor.execute(f"{source} WHERE course_code IN ({','.join('?' * len(chunk))}){group_by}", chunk)
+            rows.extend(cursor.fetchall())
+
+    for code, *counts in rows:
+        totals[code] = tuple(count or 0 for count in counts)
+    return totals
+
+if __name__ == '__main__':
+    # Backfill an existing database
+    conn = sqlite3.connect(DATABASE)
+    count = refresh_grade_rollups(conn)
+    # So running APIs reload their catalog
+    bump_generation(conn)
+    conn.commit()
+    conn.close()
+    print(f"✓ Rebuilt grade rollups for {count} courses")
@@ -0,0 +1,276 @@
+import time
+
+# Defaults for POST /api/plan
+DEFAULT_CREDIT_CAP = 15
+MAX_CREDIT_CAP = 30
+DEFAULT_MAX_TERMS = 12
+MAX_TERMS = 20
+
+# Hard limit on planning time; a plan that runs out returns what it has so far
+PLAN_DEADLINE_SECONDS = 0.05
+
+UNREACHABLE = float('inf')
+
+
+class PlanDeadlineExceeded(Exception):
+    pass
+
+
+class Planner:
+    """
+    Semester planner over the catalog's prerequisite graph.
+
+    At construction every course gets its minimum depth: the fewest terms needed
+    to take it starting from nothing, treating each AND-group as satisfied by its
+    shallowest OR-option. Depths are found with one breadth-first pass over the
+    reverse adjacency (a course is finalized once all of its groups are), so
+    courses stuck in cycles or behind prerequisites outside the catalog stay
+    unreachable. A request with completed courses reruns the pass over just the
+    courses its targets depend on, with the completed ones (in the catalog or
+    not) at depth 0. A plan then picks one option per unsatisfied group, always
+    a strictly shallower course, so the chosen prerequisites form a DAG that can
+    be layered into terms without any cycle checks.
+    """
+
+    def __init__(self, courses, graph):
+        self._graph = graph
+        self._courses = {course['code']: course for course in courses}
+        self.depth = self._min_depths()
+
+    def _min_depths(self, codes=None, completed=frozenset(), deadline=None):
+        """
+        Depths of `codes` (every course when None), with `completed` codes at
+        depth 0. Raises PlanDeadlineExceeded once `deadline` passes, if given.
+        """
+        graph = self._graph
+        depth = {}
+        pending = {}  # course -> indexes of groups not yet satisfied
+        levels = [[], []]  # codes finalized at each depth
+        for code in self._courses if codes is None else codes:
+            if code in completed:
+                depth[code] = 0
+                levels[0].append(code)
+            elif code in self._courses:
+                groups = graph.prerequisites(code)
+                if groups:
+                    pending[code] = set(range(len(groups)))
+                else:
+                    depth[code] = 1
+                    levels[1].append(code)
+
+        # Level by level, so the first option to satisfy a group is its shallowest
+        level = 0
+        while level < len(levels):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise PlanDeadlineExceeded()
+            for code in levels[level]:
+                for dependent in graph.dependents(code):
+                    remaining = pending.get(dependent)
+                    if not remaining:
+                        continue
+                    for index, group in enumerate(graph.prerequisites(dependent)):
+                        if code in group:
+                            remaining.discard(index)
+                    if not remaining:
+                        depth[dependent] = level + 1
+                        if len(levels) == level + 1:
+                            levels.append([])
+                        levels[level + 1].append(dependent)
+            level += 1
+
+        return depth
+
+    def _request_depths(self, completed, targets, deadline):
+        """Depths for one request: recomputed over the targets' prerequisites when some are completed"""
+        relevant = set()
+        for code in targets:
+            if time.perf_counter() > deadline:
+                raise PlanDeadlineExceeded()
+            if code in self._courses and code not in completed:
+                relevant.add(code)
+                relevant |= self._graph.closure(code)
+        if completed.isdisjoint(relevant):
+            return self.depth
+        return self._min_depths(relevant, completed, deadline)
+
+    def plan(self, completed, targets, credit_cap=DEFAULT_CREDIT_CAP, max_terms=DEFAULT_MAX_TERMS,
+             deadline_seconds=PLAN_DEADLINE_SECONDS):
+        """
+        Schedule `targets` (plus whatever prerequisites they still need) into terms
+        of at most `credit_cap` credits. Returns the /api/plan payload.
+        """
+        started = time.perf_counter()
+        deadline = started + deadline_seconds
+        completed = set(completed)
+
+        unschedulable = []
+        timed_out = False
+        terms = []
+        critical_path = 0
+        try:
+            depth = self._request_depths(completed, targets, deadline)
+            needed, requires = self._select_courses(completed, targets, depth, unschedulable, deadline)
+            tail = self._tails(needed, requires, depth)
+            critical_path = max(tail.values(), default=0)
+            self._layer(completed, needed, tail, credit_cap, max_terms, terms, unschedulable, deadline)
+        except PlanDeadlineExceeded:
+            timed_out = True
+            # Say why the targets that didn't make it into a term are missing
+            placed = {course['code'] for term in terms for course in term['courses']}
+            placed.update(entry['code'] for entry in unschedulable)
+            for code in sorted(set(targets) - completed - placed):
+                unschedulable.append({'code': code, 'reason': 'Planning ran out of time'})
+
+        return {
+            'terms': terms,
+            'criticalPathLength': critical_path,
+            'unschedulable': unschedulable,
+            'complete': not timed_out and not unschedulable,
+            'timedOut': timed_out,
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def critical_path_length(self, completed, targets, deadline_seconds=PLAN_DEADLINE_SECONDS):
+        """
+        Fewest terms needed to finish `targets` from `completed` if credits were
+        unlimited (the longest chain of prerequisites still to take), or None if
+        the deadline ran out. Targets that can't be scheduled are ignored.
+        """
+        deadline = time.perf_counter() + deadline_seconds
+        completed = set(completed)
+        try:
+            depth = self._request_depths(completed, targets, deadline)
+            needed, requires = self._select_courses(completed, targets, depth, [], deadline)
+        except PlanDeadlineExceeded:
+            return None
+        return max(self._tails(needed, requires, depth).values(), default=0)
+
+    def _select_courses(self, completed, targets, depth, unschedulable, deadline):
+        """Targets plus the prerequisites chosen for them, and course -> chosen prerequisites"""
+        needed = set()
+        requires = {}
+        stack = []
+        for code in sorted(set(targets) - completed):
+            if code not in self._courses:
+                unschedulable.append({'code': code, 'reason': 'Not in catalog'})
+            else:
+                needed.add(code)
+                stack.append(code)
+
+        while stack:
+            if time.perf_counter() > deadline:
+                raise PlanDeadlineExceeded()
+
+            code = stack.pop()
+            limit = depth.get(code, UNREACHABLE)
+            chosen = []
+            for group in self._graph.prerequisites(code):
+                if not completed.isdisjoint(group):
+                    continue
+                # Only shallower options, so chosen prerequisites can't form a cycle.
+                # Unreachable courses (only ever targets) may use any reachable option.
+                options = [option for option in group if depth.get(option, UNREACHABLE) < limit]
+                if not options:
+                    chosen = None
+                    break
+                planned = [option for option in options if option in needed]
+                chosen.append(min(planned or options, key=lambda option: (depth[option], option)))
+
+            if chosen is None:
+                needed.discard(code)
+                unschedulable.append({'code': code, 'reason': 'Prerequisites cannot be satisfied'})
+                continue
+
+            requires[code] = chosen
+            for option in chosen:
+                if option not in needed:
+                    needed.add(option)
+                    stack.append(option)
+
+        return needed, requires
+
+    def _tails(self, needed, requires, depth):
+        """Longest chain of needed courses starting at each course (its critical-path length)"""
+        tail = {}
+        # Dependents are strictly deeper, so deepest-first sees them before their prerequisites
+        for code in sorted(needed, key=lambda code: -depth.get(code, UNREACHABLE)):
+            tail.setdefault(code, 1)
+            for prereq in requires[code]:
+                tail[prereq] = max(tail.get(prereq, 1), tail[code] + 1)
+        return tail
+
+    def _layer(self, completed, needed, tail, credit_cap, max_terms, terms, unschedulable, deadline):
+        """
+        Append terms of available courses, longest remaining chain first, up to the
+        credit cap. Terms already appended survive a deadline.
+        """
+        done = set(completed)
+        remaining = set(needed)
+
+        while remaining and len(terms) < max_terms:
+            if time.perf_counter() > deadline:
+                raise PlanDeadlineExceeded()
+
+            available = [
+                code for code in remaining
+                if all(not done.isdisjoint(group) for group in self._graph.prerequisites(code))
+            ]
+            available.sort(key=lambda code: (-tail[code], code))
+
+            term_courses = []
+            term_credits = 0
+            for code in available:
+                credits = self._courses[code]['creditsUndergrad']
+                # A course heavier than the cap still gets a term to itself
+                if term_credits + credits <= credit_cap or not term_courses:
+                    term_courses.append(code)
+                    term_credits += credits
+
+            terms.append({
+                'term': len(terms) + 1,
+                'credits': term_credits,
+                'courses': [{
+                    'code': code,
+                    'title': self._courses[code]['title'],
+                    'credits': self._courses[code]['creditsUndergrad']
+                } for code in term_courses]
+            })
+            done.update(term_courses)
+            remaining.difference_update(term_courses)
+
+        for code in sorted(remaining):
+            unschedulable.append({'code': code, 'reason': f'Does not fit in {max_terms} terms'})
+
+
+def _parse_int(value, name, default, maximum):
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f'{name} must be an integer')
+    if value < 1:
+        raise ValueError(f'{name} must be positive')
+    return min(value, maximum)
+
+def parse_plan_request(data):
+    """
+    Validate a POST /api/plan body. Returns (completed, target codes, major_id,
+    credit_cap, max_terms). Raises ValueError for a malformed body.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+
+    completed = data.get('completed', [])
+    targets = data.get('targets', [])
+    for name, codes in (('completed', completed), ('targets', targets)):
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise ValueError(f'{name} must be a list of course codes')
+
+    major_id = data.get('majorId')
+    if major_id is not None and (isinstance(major_id, bool) or not isinstance(major_id, int)):
+        raise ValueError('majorId must be an integer')
+    if major_id is None and not targets:
+        raise ValueError('Provide majorId or targets')
+
+    credit_cap = _parse_int(data.get('creditCap'), 'creditCap', DEFAULT_CREDIT_CAP, MAX_CREDIT_CAP)
+    max_terms = _parse_int(data.get('maxTerms'), 'maxTerms', DEFAULT_MAX_TERMS, MAX_TERMS)
+    return completed, targets, major_id, credit_cap, max_terms
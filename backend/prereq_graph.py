@@ -0,0 +1,247 @@
+class PrerequisiteGraph:
+    """
+    Prerequisite graph over course codes, built once per catalog snapshot.
+
+    Construction runs a single depth-first pass that finds strongly connected
+    components (so prerequisite cycles are detected up front) and records the
+    back edges that close them. Closures and prerequisite trees are computed on
+    first request and memoized per course. Trees skip back edges, so a cycle
+    shows up as a leaf marked `cycle: True` instead of recursing forever.
+
+    The reverse adjacency ("which courses list X as a prerequisite") is built
+    up front as well, so unlock lookups never scan the prerequisites table.
+    """
+
+    def __init__(self, courses):
+        self._titles = {}
+        self._groups = {}
+        for course in courses:
+            self._titles[course['code']] = course['title']
+            self._groups[course['code']] = tuple(tuple(group) for group in course['prerequisiteGroups'])
+
+        self._component = {}
+        self._back_edges = set()
+        self.cyclic = frozenset()
+        self._find_cycles()
+
+        self._members = {}
+        for code, component in self._component.items():
+            self._members.setdefault(component, []).append(code)
+
+        # Reverse adjacency: prerequisite code -> courses that list it
+        self._dependents = {}
+        for code, groups in self._groups.items():
+            for prereq in self._direct(code):
+                self._dependents.setdefault(prereq, []).append(code)
+
+        self._component_closures = {}
+        self._trees = {}
+        self._unlocks = {}
+
+    def prerequisites(self, code):
+        """Direct prerequisite groups of a course (AND of ORs); empty for unknown codes"""
+        return self._groups.get(code, ())
+
+    def _direct(self, code):
+        # Distinct direct prerequisites, in group order
+        seen = []
+        for group in self._groups.get(code, ()):
+            for prereq in group:
+                if prereq not in seen:
+                    seen.append(prereq)
+        return seen
+
+    def _find_cycles(self):
+        """Iterative Tarjan's SCC, also recording edges that point back into the DFS path"""
+        index = {}
+        lowlink = {}
+        scc_stack = []
+        on_scc_stack = set()
+        on_path = set()
+        counter = 0
+        cyclic = set()
+
+        for root in sorted(self._groups):
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = counter
+            counter += 1
+            scc_stack.append(root)
+            on_scc_stack.add(root)
+            on_path.add(root)
+            work = [(root, iter(self._direct(root)))]
+
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        scc_stack.append(child)
+                        on_scc_stack.add(child)
+                        on_path.add(child)
+                        work.append((child, iter(self._direct(child))))
+                        advanced = True
+                        break
+                    if child in on_path:
+                        self._back_edges.add((node, child))
+                    if child in on_scc_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                if advanced:
+                    continue
+
+                work.pop()
+                on_path.discard(node)
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    members = []
+                    while True:
+                        member = scc_stack.pop()
+                        on_scc_stack.discard(member)
+                        self._component[member] = node
+                        members.append(member)
+                        if member == node:
+                            break
+                    if len(members) > 1 or (node, node) in self._back_edges:
+                        cyclic.update(members)
+
+        self.cyclic = frozenset(cyclic)
+
+    def closure(self, code):
+        """Every course reachable through prerequisites of `code` (not including itself)"""
+        if code not in self._component:
+            return frozenset()
+        result = self._component_closure(self._component[code])
+        return result - {code} if code in result else result
+
+    def _component_successors(self, component):
+        successors = []
+        for member in self._members[component]:
+            for prereq in self._direct(member):
+                succ = self._component[prereq]
+                if succ != component and succ not in successors:
+                    successors.append(succ)
+        return successors
+
+    def _component_closure(self, component):
+        # Successor components first, so each closure is a union of finished ones
+        for comp in _post_order(component, self._component_successors, self._component_closures):
+            reach = set()
+            members = self._members[comp]
+            for member in members:
+                for prereq in self._direct(member):
+                    reach.add(prereq)
+                    succ = self._component[prereq]
+                    if succ != comp:
+                        reach |= self._component_closures[succ]
+            if len(members) > 1:
+                reach.update(members)
+            self._component_closures[comp] = frozenset(reach)
+
+        return self._component_closures[component]
+
+    def _tree_children(self, code):
+        return [prereq for prereq in self._direct(code) if (code, prereq) not in self._back_edges]
+
+    def tree(self, code):
+        """
+        Nested prerequisite tree for `code`:
+        {'code', 'title', 'inCatalog', 'groups': [[node, ...], ...]}
+        Groups are AND'd together, nodes within a group are OR'd.
+        """
+        # Children before parents, so every subtree is built (and memoized) once
+        for node in _post_order(code, self._tree_children, self._trees):
+            groups = []
+            for group in self._groups.get(node, ()):
+                groups.append([
+                    self._cycle_leaf(prereq) if (node, prereq) in self._back_edges else self._trees[prereq]
+                    for prereq in group
+                ])
+            self._trees[node] = {
+                'code': node,
+                'title': self._titles.get(node),
+                'inCatalog': node in self._titles,
+                'groups': groups
+            }
+
+        return self._trees[code]
+
+    def dependents(self, code):
+        """Courses that list `code` directly in one of their prerequisite groups"""
+        return self._dependents.get(code, ())
+
+    def unlocks(self, code):
+        """
+        Direct and transitive dependents of `code`. Each entry counts how many of
+        the dependent's AND-groups can be satisfied through `code` (directly, or
+        via another dependent for transitive entries).
+        """
+        cached = self._unlocks.get(code)
+        if cached is not None:
+            return cached
+
+        reachable = set()
+        queue = list(self._dependents.get(code, ()))
+        while queue:
+            dependent = queue.pop()
+            if dependent in reachable:
+                continue
+            reachable.add(dependent)
+            queue.extend(self._dependents.get(dependent, ()))
+        reachable.discard(code)
+
+        sources = reachable | {code}
+        direct = []
+        transitive = []
+        for dependent in sorted(reachable):
+            groups = self._groups[dependent]
+            entry = {
+                'code': dependent,
+                'title': self._titles.get(dependent),
+                'groupCount': len(groups)
+            }
+            if dependent in self._dependents.get(code, ()):
+                entry['groupsSatisfied'] = sum(1 for group in groups if code in group)
+                direct.append(entry)
+            else:
+                entry['groupsSatisfied'] = sum(1 for group in groups if not sources.isdisjoint(group))
+                transitive.append(entry)
+
+        result = {'direct': direct, 'transitive': transitive}
+        self._unlocks[code] = result
+        return result
+
+    def _cycle_leaf(self, code):
+        return {
+            'code': code,
+            'title': self._titles.get(code),
+            'inCatalog': code in self._titles,
+            'groups': [],
+            'cycle': True
+        }
+
+
+def _post_order(start, successors, done):
+    """Depth-first post-order from `start`, skipping nodes already in `done`"""
+    if start in done:
+        return []
+
+    order = []
+    visited = {start}
+    work = [(start, iter(successors(start)))]
+    while work:
+        node, children = work[-1]
+        for child in children:
+            if child not in visited and child not in done:
+                visited.add(child)
+                work.append((child, iter(successors(child))))
+                break
+        else:
+            work.pop()
+            order.append(node)
+    return order
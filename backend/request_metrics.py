@@ -0,0 +1,154 @@
+# Per-route request metrics (latency, SQL statements, response size) and cache
+# stats, rendered in the Prometheus text format for GET /api/_metrics.
+# Numbers are kept per process: one Flask worker, or one warm serverless instance.
+import math
+import threading
+from collections import deque
+
+# Latency and size quantiles are taken over each route's most recent requests
+SAMPLE_WINDOW = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RouteMetrics:
+    """Counters and recent samples for one (method, route)"""
+
+    __slots__ = ('statuses', 'seconds', 'statements', 'latencies', 'sizes', 'size_total', 'size_count')
+
+    def __init__(self):
+        self.statuses = {}
+        self.seconds = 0.0
+        self.statements = 0
+        self.latencies = deque(maxlen=SAMPLE_WINDOW)
+        self.sizes = deque(maxlen=SAMPLE_WINDOW)
+        self.size_total = 0
+        self.size_count = 0
+
+
+class Metrics:
+    """
+    Request metrics for one process plus the stats of registered caches and
+    worker pools.
+
+    `observe` is called once per request with its route template (so
+    /api/courses/<course_code> is one series, not one per course). Caches are
+    registered with a function returning their stats() dict and read only when
+    the metrics are rendered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._caches = {}
+        self._pools = {}
+
+    def observe(self, method, route, status, seconds, statements, size):
+        """Record one request. `size` is the body length in bytes, or None if unknown (streamed)."""
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.seconds += seconds
+            metrics.statements += statements
+            metrics.latencies.append(seconds)
+            if size is not None:
+                metrics.sizes.append(size)
+                metrics.size_total += size
+                metrics.size_count += 1
+
+    def register_cache(self, name, stats):
+        """Report `stats()` (hits, misses, entries, bytes) under cache=`name`"""
+        self._caches[name] = stats
+
+    def register_pool(self, name, stats):
+        """Report `stats()` (workers, pending, maxPending, rejected) under pool=`name`"""
+        self._pools[name] = stats
+
+    def render(self):
+        """Everything recorded so far as Prometheus text-format bytes"""
+        with self._lock:
+            routes = sorted(
+                (key, metrics.statuses.copy(), metrics.seconds, metrics.statements,
+                 sorted(metrics.latencies), sorted(metrics.sizes), metrics.size_total, metrics.size_count)
+                for key, metrics in self._routes.items()
+            )
+
+        lines = []
+        _header(lines, 'coursescope_requests_total', 'counter', 'Requests handled, by route and status.')
+        for (method, route), statuses, *_ in routes:
+            for status, count in sorted(statuses.items()):
+                lines.append(_sample('coursescope_requests_total',
+                                     {'method': method, 'route': route, 'status': status}, count))
+
+        _header(lines, 'coursescope_request_duration_seconds', 'summary',
+                f'Request latency; quantiles over the last {SAMPLE_WINDOW} requests per route.')
+        for (method, route), statuses, seconds, _, latencies, *_ in routes:
+            labels = {'method': method, 'route': route}
+            _summary(lines, 'coursescope_request_duration_seconds', labels, latencies, seconds,
+                     sum(statuses.values()))
+
+        _header(lines, 'coursescope_sql_statements_total', 'counter', 'SQL statements run while handling requests.')
+        for (method, route), _, _, statements, *_ in routes:
+            lines.append(_sample('coursescope_sql_statements_total', {'method': method, 'route': route}, statements))
+
+        _header(lines, 'coursescope_response_size_bytes', 'summary',
+                f'Response body size; quantiles over the last {SAMPLE_WINDOW} sized responses per route.')
+        for (method, route), _, _, _, _, sizes, size_total, size_count in routes:
+            _summary(lines, 'coursescope_response_size_bytes', {'method': method, 'route': route},
+                     sizes, size_total, size_count)
+
+        caches = sorted((name, stats()) for name, stats in self._caches.items())
+        for metric, key, kind, help_text in (
+                ('coursescope_cache_hits_total', 'hits', 'counter', 'Cache lookups answered from the cache.'),
+                ('coursescope_cache_misses_total', 'misses', 'counter', 'Cache lookups that had to build the body.'),
+                ('coursescope_cache_entries', 'entries', 'gauge', 'Entries held by the cache.'),
+                ('coursescope_cache_bytes', 'bytes', 'gauge', 'Encoded bytes held by the cache.')):
+            _header(lines, metric, kind, help_text)
+            for name, stats in caches:
+                lines.append(_sample(metric, {'cache': name}, stats.get(key, 0)))
+
+        _header(lines, 'coursescope_cache_hit_ratio', 'gauge', 'Share of cache lookups that were hits.')
+        for name, stats in caches:
+            lookups = stats.get('hits', 0) + stats.get('misses', 0)
+            lines.append(_sample('coursescope_cache_hit_ratio', {'cache': name},
+                                 stats.get('hits', 0) / lookups if lookups else 0))
+
+        # Only the ASGI server runs requests on pools
+        pools = sorted((name, stats()) for name, stats in self._pools.items())
+        if pools:
+            for metric, key, kind, help_text in (
+                    ('coursescope_pool_workers', 'workers', 'gauge', 'Threads in the worker pool.'),
+                    ('coursescope_pool_pending', 'pending', 'gauge', 'Requests admitted to the pool (running + queued).'),
+                    ('coursescope_pool_max_pending', 'maxPending', 'gauge', 'Requests the pool admits before answering 503.'),
+                    ('coursescope_pool_rejected_total', 'rejected', 'counter', 'Requests turned away with 503.')):
+                _header(lines, metric, kind, help_text)
+                for name, stats in pools:
+                    lines.append(_sample(metric, {'pool': name}, stats[key]))
+
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _sample(name, labels, value):
+    label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    return f'{name}{{{label_text}}} {value!r}'
+
+def _header(lines, name, kind, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+
+def _quantile(ordered, q):
+    # Nearest-rank quantile of an already sorted list
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def _summary(lines, name, labels, ordered, total, count):
+    if ordered:
+        for q in QUANTILES:
+            lines.append(_sample(name, dict(labels, quantile=q), float(_quantile(ordered, q))))
+    lines.append(_sample(name + '_sum', labels, float(total)))
+    lines.append(_sample(name + '_count', labels, count))
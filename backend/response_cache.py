@@ -0,0 +1,451 @@
+import hashlib
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Responses can change whenever the scrapers run, so clients may keep them but
+# must revalidate with If-None-Match (answered with a 304 when nothing changed)
+CACHE_CONTROL = 'public, no-cache'
+
+# Streamed responses are flushed in pieces of about this many bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Disk budget of the shared (cross-worker) response cache
+DEFAULT_SHARED_CACHE_BYTES = 256 * 1024 * 1024
+
+# Half-written shared cache files older than this are left over from a crash
+ORPHAN_TEMP_SECONDS = 60
+
+# A worker rescans the shared cache directory after this many writes of its own,
+# to catch up with what the other workers wrote
+SHARED_CACHE_SCAN_WRITES = 100
+
+def encode_json(payload):
+    """Compact JSON bytes, the format every pre-serialized response uses"""
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def make_etag(body):
+    """Strong ETag from the response bytes"""
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def iter_json_array(fragments):
+    """Yield the pieces of a JSON array built from already-encoded elements"""
+    yield b'['
+    for i, fragment in enumerate(fragments):
+        if i:
+            yield b','
+        yield fragment
+    yield b']'
+
+def coalesce_chunks(pieces, size=STREAM_CHUNK_SIZE):
+    """Group small byte pieces into chunks of roughly `size` bytes for streaming"""
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+class PreparedResponse:
+    """Encoded JSON body plus its ETag"""
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = make_etag(body)
+
+
+class ResponseCache:
+    """
+    Pre-encoded GET responses keyed by catalog version and route.
+
+    Each body is encoded and hashed once per catalog version. When a request
+    arrives with a newer catalog version, every entry from the old one is dropped.
+    With a `shared` SharedFileCache behind it, a miss here first looks for a
+    body another worker already built, and bodies built here are shared with them.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+        self._bytes = 0
+        # Updated without the lock, so approximate under concurrency
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, version, key, build_body):
+        body = self.shared.get(version, key) if self.shared is not None else None
+        if body is None:
+            body = build_body()
+            if self.shared is not None:
+                self.shared.put(version, key, body)
+        return PreparedResponse(body)
+
+    def get(self, version, key, build_body):
+        """Return the PreparedResponse for `key`, calling `build_body()` for the bytes on a miss"""
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._entries = {}
+                    self._bytes = 0
+                    self._version = version
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self._build(version, key, build_body)
+        with self._lock:
+            # A newer catalog may have taken over while the body was built; an
+            # old body must not be stored under it
+            if version == self._version and key not in self._entries:
+                self._entries[key] = entry
+                self._bytes += len(entry.body)
+        return entry
+
+    def warm(self, version, entries):
+        """
+        Encode every (key, build_body) in `entries` for `version` ahead of the
+        requests for them. The new entries replace an older version in one swap.
+        """
+        prepared = {key: self._build(version, key, build_body) for key, build_body in entries}
+        with self._lock:
+            if version != self._version:
+                self._entries = prepared
+                self._bytes = sum(len(entry.body) for entry in prepared.values())
+                self._version = version
+            else:
+                for key, entry in prepared.items():
+                    if key not in self._entries:
+                        self._entries[key] = entry
+                        self._bytes += len(entry.body)
+        return len(prepared)
+
+    def stats(self):
+        """Entries and encoded bytes held in this process, hit counts, and the shared tier's stats"""
+        stats = {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._bytes = 0
+            self._version = None
+
+
+def private_directory(path):
+    """
+    Create `path` accessible to this user only (0700), or make sure an existing
+    one is a real directory owned by this user and restrict it to them. Returns
+    False, saying why on stderr, when it can't be trusted with cached responses.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode):
+            reason = 'not a directory'
+        elif hasattr(os, 'getuid') and info.st_uid != os.getuid():
+            reason = 'owned by another user'
+        else:
+            if info.st_mode & 0o077:
+                os.chmod(path, 0o700)
+            return True
+    except OSError as e:
+        reason = str(e)
+    print(f"Not using {path} for shared responses ({reason})", file=sys.stderr)
+    return False
+
+
+class SharedFileCache:
+    """
+    Encoded response bodies in a local directory, shared by every worker process
+    on the machine (the second level behind each worker's ResponseCache).
+
+    Bodies are stored one file per key under a directory per catalog version
+    and `fingerprint` (of the code that encodes them), so bodies left on disk
+    by an older deploy are never served for the same catalog.
+    Each file is written under a temporary name and renamed into place, so a
+    reader sees a whole body or nothing. Each worker keeps a running total of
+    the bytes on disk, set by a scan of the directory and advanced by its own
+    writes; when the total passes `max_bytes`, or every SHARED_CACHE_SCAN_WRITES
+    writes, it rescans and removes the oldest files until the directory fits.
+    Old versions stop being read and age out this way. Any I/O error counts as
+    a miss: the shared tier only ever saves work.
+
+    `directory` should come from private_directory(): bodies read from it are
+    sent to clients as they are.
+    """
+
+    def __init__(self, directory, fingerprint, max_bytes=DEFAULT_SHARED_CACHE_BYTES):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = None  # unknown until the first scan
+        self._writes_since_scan = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _path(self, version, key):
+        return os.path.join(self.directory, f'{version}-{self.fingerprint}',
+                            hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, version, key):
+        """The stored body for `key` under `version`, or None"""
+        try:
+            with open(self._path(version, key), 'rb') as f:
+                body = f.read()
+        except OSError:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return body
+
+    def put(self, version, key, body):
+        """Store `body` atomically. Returns False if it couldn't be written."""
+        path = self._path(version, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(body)
+                os.replace(temp_path, path)
+            except OSError:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            return False
+
+        with self._lock:
+            self.writes += 1
+            self._writes_since_scan += 1
+            if self._bytes is not None:
+                self._bytes += len(body)
+            scan = (self._bytes is None or self._bytes > self.max_bytes
+                    or self._writes_since_scan >= SHARED_CACHE_SCAN_WRITES)
+        if scan:
+            self._prune()
+        return True
+
+    def _files(self):
+        # (mtime, size, path) of every stored body and stale temporary file
+        files = []
+        now = time.time()
+        try:
+            versions = [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            return files
+        for version_dir in versions:
+            try:
+                entries = list(os.scandir(version_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.startswith('.tmp-') and now - stat.st_mtime < ORPHAN_TEMP_SECONDS:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _prune(self):
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        over_budget = total > self.max_bytes
+        if over_budget:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+
+        with self._lock:
+            self._bytes = total
+            self._writes_since_scan = 0
+        if not over_budget:
+            return
+
+        # Drop version directories that emptied out
+        try:
+            version_dirs = [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            return
+        for version_dir in version_dirs:
+            try:
+                os.rmdir(version_dir)
+            except OSError:
+                pass
+
+    def stats(self):
+        """Files and bytes on disk plus this process's hit, miss and write counts"""
+        files = [item for item in self._files() if not os.path.basename(item[2]).startswith('.tmp-')]
+        with self._lock:
+            return {
+                'entries': len(files),
+                'bytes': sum(size for _, size, _ in files),
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes
+            }
+
+    def clear(self):
+        """Remove every stored body"""
+        for _, _, path in self._files():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._bytes = None
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache for computed response bodies (e.g. POST
+    results), keyed by catalog version like ResponseCache. Counts hits and misses.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key, build_body):
+        """Return (bytes, hit) for `key`, calling `build_body()` on a miss"""
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body, True
+            self.misses += 1
+
+        # Built outside the lock; two threads may race to build the same key
+        body = build_body()
+        with self._lock:
+            if version == self._version and key not in self._entries:
+                self._entries[key] = body
+                self._bytes += len(body)
+                if len(self._entries) > self.max_entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return body, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+
+
+def write_prepared_response(handler, prepared):
+    """Send a PreparedResponse from a BaseHTTPRequestHandler, honouring If-None-Match"""
+    not_modified = etag_matches(handler.headers.get('If-None-Match'), prepared.etag)
+
+    handler.send_response(304 if not_modified else 200)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    handler.send_header('ETag', prepared.etag)
+    handler.send_header('Cache-Control', CACHE_CONTROL)
+    if not not_modified:
+        handler.send_header('Content-Length', str(len(prepared.body)))
+    handler.end_headers()
+
+    if not not_modified:
+        handler.wfile.write(prepared.body)
+
+def write_streamed_response(handler, pieces):
+    """Stream JSON pieces from a BaseHTTPRequestHandler; the closed connection ends the body"""
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    handler.send_header('Cache-Control', CACHE_CONTROL)
+    handler.end_headers()
+
+    for chunk in coalesce_chunks(pieces):
+        handler.wfile.write(chunk)
+
+def write_json_response(handler, body, status=200, headers=()):
+    """Send encoded JSON from a BaseHTTPRequestHandler"""
+    handler.send_response(status)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    for name, value in headers:
+        handler.send_header(name, value)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+def write_error_response(handler, status, message):
+    """Send {"error": message} from a BaseHTTPRequestHandler"""
+    write_json_response(handler, encode_json({'error': message}), status)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Full-text course search over an FTS5 index of course code, title and description.
+# The course scraper rebuilds the rows for every course it writes, so the index
+# always matches the courses table; the API only queries it.
+import html
+import sqlite3
+import os
+import re
+
+from catalog_generation import bump_generation
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE = os.path.join(BASE_DIR, 'uic_courses.db')
+
+# bm25() column weights: a code hit outranks a title hit, which outranks the description
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+DEFAULT_RESULT_LIMIT = 20
+MAX_RESULT_LIMIT = 100
+
+HIGHLIGHT_OPEN = '<mark>'
+HIGHLIGHT_CLOSE = '</mark>'
+
+# What FTS5 wraps matches in: control characters that scraped catalog text
+# doesn't contain, swapped for the tags once the text around them is escaped
+_MATCH_OPEN = '\x02'
+_MATCH_CLOSE = '\x03'
+
+def create_search_index(conn):
+    """Create the courses_fts table if it doesn't exist"""
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+            course_code,
+            title,
+            description,
+            tokenize = 'porter unicode61'
+        )
+    ''')
+
+def search_index_exists(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'courses_fts'")
+    return cursor.fetchone() is not None
+
+def _chunks(items, size=500):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def refresh_search_index(conn, course_codes=None):
+    """
+    Rewrite the courses_fts rows for `course_codes`, or rebuild the whole index
+    when None. Codes that aren't in the courses table are removed. Does not commit.
+    """
+    cursor = conn.cursor()
+    create_search_index(conn)
+
+    if course_codes is None:
+        cursor.execute('DELETE FROM courses_fts')
+        cursor.execute('''
+            INSERT INTO courses_fts (course_code, title, description)
+            SELECT course_code, title, COALESCE(description, '')
+            FROM courses
+        ''')
+        return cursor.rowcount
+
+    refreshed = 0
+    for chunk in _chunks(sorted(set(course_codes))):
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'DELETE FROM courses_fts WHERE course_code IN ({placeholders})', chunk)
+        cursor.execute(f'''
+            INSERT INTO courses_fts (course_code, title, description)
+            SELECT course_code, title, COALESCE(description, '')
+            FROM courses
+            WHERE course_code IN ({placeholders})
+        ''', chunk)
+        refreshed += cursor.rowcount
+
+    return refreshed
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 MATCH expression: every word must match, as a
+    prefix so results show up while typing. 'cs141' is split like 'CS 141'.
+    Returns None when the text has no searchable words.
+    """
+    terms = []
+    for word in re.findall(r'\w+', text.lower()):
+        match = re.fullmatch(r'([a-z]{2,4})(\d{3})', word)
+        terms.extend(match.groups() if match else (word,))
+
+    if not terms:
+        return None
+    # Quoting keeps FTS5 operators (AND, NEAR, column:) in the input literal
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+def _highlight_markup(text):
+    # HTML-escape the catalog text, then mark the matches, so the only markup in
+    # a highlight is the <mark> tags
+    return html.escape(text).replace(_MATCH_OPEN, HIGHLIGHT_OPEN).replace(_MATCH_CLOSE, HIGHLIGHT_CLOSE)
+
+def search_courses(conn, text, limit=DEFAULT_RESULT_LIMIT):
+    """
+    BM25-ranked courses matching `text`, best first. Each result has the code,
+    title, the title with matches highlighted, a highlighted description
+    snippet and the rank score (lower is better). The highlight and snippet
+    are HTML: escaped text with the matches in <mark> tags.
+    """
+    match_query = build_match_query(text)
+    if match_query is None:
+        return []
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT
+            course_code,
+            title,
+            highlight(courses_fts, 1, ?, ?) AS title_highlight,
+            snippet(courses_fts, 2, ?, ?, '…', 16) AS snippet,
+            bm25(courses_fts, {', '.join(str(weight) for weight in RANK_WEIGHTS)}) AS score
+        FROM courses_fts
+        WHERE courses_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+    ''', (_MATCH_OPEN, _MATCH_CLOSE, _MATCH_OPEN, _MATCH_CLOSE, match_query, limit))
+
+    return [{
+        'code': row[0],
+        'title': row[1],
+        'titleHighlight': _highlight_markup(row[2]),
+        'snippet': _highlight_markup(row[3]),
+        'score': round(row[4], 4)
+    } for row in cursor.fetchall()]
+
+def parse_result_limit(limit):
+    """Validate a ?limit= value for search results. Raises ValueError."""
+    if limit is None or limit == '':
+        return DEFAULT_RESULT_LIMIT
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, MAX_RESULT_LIMIT)
+
+if __name__ == '__main__':
+    # Build the index for an existing database
+    conn = sqlite3.connect(DATABASE)
+    count = refresh_search_index(conn)
+    # So running APIs reload their catalog
+    bump_generation(conn)
+    conn.commit()
+    conn.close()
+    print(f"✓ Indexed {count} courses for search")
@@ -0,0 +1,183 @@
+# Opt-in SQL tracing for the API (SQL_TRACE=1, or SQL_TRACE=debug to also get
+# response headers). Connections opened with `connection_factory()` time every
+# statement, including the time spent fetching its rows, against the current
+# request. When the request finishes, statements slower than SQL_TRACE_SLOW_MS
+# and statements that ran more than SQL_TRACE_REPEATS times (after literals
+# are normalized away, so one query per loop iteration collapses into one
+# line: the N+1 pattern) are written as JSON lines to the slow-query log.
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+
+MODE = os.environ.get('SQL_TRACE', '').strip().lower()
+ENABLED = MODE not in ('', '0', 'false', 'off')
+DEBUG_HEADERS = MODE == 'debug'
+
+# A normalized statement running more than this many times in one request is flagged
+REPEAT_THRESHOLD = int(os.environ.get('SQL_TRACE_REPEATS', 5))
+SLOW_STATEMENT_MS = float(os.environ.get('SQL_TRACE_SLOW_MS', 50))
+
+# Longest SQL text put in a response header
+HEADER_SQL_LENGTH = 200
+
+log = logging.getLogger('coursescope.sql')
+if not log.handlers:
+    _log_path = os.environ.get('SQL_TRACE_LOG')
+    _handler = logging.FileHandler(_log_path) if _log_path else logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+def normalize(sql):
+    """Statement text with literals replaced by ?, IN lists collapsed and whitespace squeezed"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(?)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class RequestTrace:
+    """Statements run during one request, as [normalized sql, seconds] entries"""
+
+    def __init__(self):
+        self.statements = []
+
+    def record(self, sql, seconds):
+        entry = [normalize(sql), seconds]
+        self.statements.append(entry)
+        return entry
+
+    def total_seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """[(normalized sql, count, total seconds)] for statements run more than `threshold` times"""
+        counts = defaultdict(lambda: [0, 0.0])
+        for sql, seconds in self.statements:
+            counts[sql][0] += 1
+            counts[sql][1] += seconds
+        return sorted(((sql, count, seconds) for sql, (count, seconds) in counts.items() if count > threshold),
+                      key=lambda item: -item[1])
+
+    def slow(self, threshold_ms=SLOW_STATEMENT_MS):
+        return [(sql, seconds) for sql, seconds in self.statements if seconds * 1000 >= threshold_ms]
+
+
+_local = threading.local()
+
+def _current():
+    return getattr(_local, 'trace', None)
+
+def _record(sql, seconds):
+    trace = _current()
+    return trace.record(sql, seconds) if trace is not None else None
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that charges execute and fetch time to the statement it ran"""
+
+    _entry = None
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._entry is not None:
+                self._entry[1] += time.perf_counter() - started
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._entry = _record(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._entry = _record(sql, time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def __next__(self):
+        return self._timed(super().__next__)
+
+
+class TracingConnection(sqlite3.Connection):
+    """Connection whose cursors, including the one behind execute(), are TracingCursors"""
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """The `factory` argument for sqlite3.connect: tracing when SQL_TRACE is set"""
+    return TracingConnection if ENABLED else sqlite3.Connection
+
+def start_request():
+    """Begin collecting statements for the request on this thread"""
+    if ENABLED:
+        _local.trace = RequestTrace()
+
+def finish_request(method, route):
+    """
+    Stop collecting for this thread, log slow and repeated statements, and
+    return the request's RequestTrace (None when tracing is off).
+    """
+    trace = _current()
+    _local.trace = None
+    if trace is None:
+        return None
+
+    for sql, seconds in trace.slow():
+        log.info(json.dumps({'event': 'slow_statement', 'method': method, 'route': route,
+                             'sql': sql, 'ms': round(seconds * 1000, 3)}))
+    for sql, count, seconds in trace.repeated():
+        log.info(json.dumps({'event': 'repeated_statement', 'method': method, 'route': route,
+                             'sql': sql, 'count': count, 'ms': round(seconds * 1000, 3),
+                             'threshold': REPEAT_THRESHOLD}))
+    return trace
+
+def debug_headers(trace=None):
+    """
+    X-SQL-* response headers describing the request traced so far on this
+    thread (or `trace`), as (name, value) pairs.
+    """
+    trace = trace or _current()
+    if trace is None:
+        return []
+
+    repeated = trace.repeated()
+    headers = [('X-SQL-Trace', f'statements={len(trace.statements)}; '
+                               f'time-ms={trace.total_seconds() * 1000:.3f}; repeated={len(repeated)}')]
+    for sql, count, _ in repeated:
+        headers.append(('X-SQL-Repeated', f'{count}x {sql[:HEADER_SQL_LENGTH]}'))
+    return headers
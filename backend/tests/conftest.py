@@ -0,0 +1,5 @@
+# Run from backend/: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+import asyncio
+import importlib
+import json
+import os
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import generate
+from response_cache import STREAM_CHUNK_SIZE
+
+# One course with enough sections that its streamed grade report spans many chunks
+LARGE_COURSE_SECTIONS = 1500
+
+
+@pytest.fixture(scope='module')
+def asgi(tmp_path_factory):
+    database = str(tmp_path_factory.mktemp('asgi') / 'catalog.db')
+    generate(database, courses=50)
+    conn = sqlite3.connect(database)
+    code = conn.execute('SELECT course_code FROM courses ORDER BY course_code LIMIT 1').fetchone()[0]
+    conn.executemany('''
+        INSERT INTO grade_distributions
+        (course_code, semester_id, instructor, grade_a, grade_b, grade_c, grade_d, grade_f,
+         grade_w, grade_s, grade_u, total_students)
+        VALUES (?, 1, ?, 10, 5, 3, 1, 1, 0, 0, 0, 20)
+    ''', ((code, f'Instructor {i:04d}') for i in range(LARGE_COURSE_SECTIONS)))
+    conn.commit()
+    conn.close()
+
+    os.environ['DATABASE_PATH'] = database
+    os.environ['RESPONSE_CACHE_DIR'] = ''
+    module = importlib.import_module('asgi')
+    module.large_course = code
+    return module
+
+
+def _get(asgi, path, query=b''):
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query,
+             'http_version': '1.1', 'headers': []}
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0], [message['body'] for message in sent[1:]]
+
+
+def test_streamed_grade_report_larger_than_a_chunk(asgi):
+    path = '/api/courses/' + asgi.large_course + '/grades'
+    start, bodies = _get(asgi, path, b'stream=1')
+
+    assert start['status'] == 200
+    body = b''.join(bodies)
+    assert len(body) > 4 * STREAM_CHUNK_SIZE
+    assert len(bodies) > 4
+    report = json.loads(body)
+    assert len(report['distributions']) >= LARGE_COURSE_SECTIONS
+
+    whole_start, whole = _get(asgi, path)
+    assert whole_start['status'] == 200
+    assert json.loads(b''.join(whole)) == report
+
+
+def test_client_leaving_mid_stream_frees_the_pool_thread(asgi):
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        if len(sent) == 2:
+            raise OSError('client went away')
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/api/courses/' + asgi.large_course + '/grades',
+             'query_string': b'stream=1', 'http_version': '1.1', 'headers': []}
+    with pytest.raises(OSError):
+        asyncio.run(asyncio.wait_for(asgi.app(scope, receive, send), 5))
+    assert asgi.light_pool.pending == 0
+
+    start, _ = _get(asgi, '/api/majors')
+    assert start['status'] == 200
+
+
+def test_metrics_report_the_pools(asgi):
+    start, bodies = _get(asgi, '/api/_metrics')
+    assert start['status'] == 200
+    text = b''.join(bodies).decode('utf-8')
+    assert 'coursescope_pool_pending{pool="light"} 1' in text
+    assert 'coursescope_pool_rejected_total{pool="heavy"} 0' in text
+    assert 'coursescope_pool_workers{pool="heavy"} 2' in text
@@ -0,0 +1,29 @@
+import os
+import shutil
+
+import pytest
+
+from benchmarks.synthetic import generate
+from catalog import get_catalog, load_catalog
+from db import ReadOnlyConnections
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('catalog') / 'catalog.db')
+    generate(path, courses=200)
+    return path
+
+
+def test_catalog_loads_through_the_serving_uri(database, tmp_path):
+    # The handlers key the catalog by the deployed path but read a copy of it
+    copy = str(tmp_path / 'serving.db')
+    shutil.copyfile(database, copy)
+    uri = ReadOnlyConnections(copy, immutable=True).uri
+    assert 'immutable=1' in uri
+
+    deployed = str(tmp_path / 'deployed' / 'catalog.db')
+    assert not os.path.exists(deployed)
+    catalog = get_catalog(deployed, uri)
+    assert catalog.version == load_catalog(database).version
+    assert get_catalog(deployed, uri) is catalog
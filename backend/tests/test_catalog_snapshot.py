@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import pytest
+
+from benchmarks.synthetic import generate
+from catalog import _database_generation, get_catalog, load_catalog
+from catalog_snapshot import build_snapshot, read_snapshot, snapshot_path
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('snapshot') / 'catalog.db')
+    generate(path, courses=200)
+    return path
+
+
+def test_snapshot_round_trip(database):
+    build_snapshot(database)
+    catalog = read_snapshot(snapshot_path(database), database, _database_generation(database))
+    assert catalog is not None
+    assert catalog.version == load_catalog(database).version
+
+
+def test_truncated_snapshot_is_ignored(database, capsys):
+    path = snapshot_path(database)
+    build_snapshot(database)
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+    assert read_snapshot(path, database, _database_generation(database)) is None
+    assert 'could not be read' in capsys.readouterr().err
+
+
+def test_snapshot_of_a_replaced_database_is_ignored(tmp_path):
+    database = str(tmp_path / 'catalog.db')
+    generate(database, courses=100, seed=1)
+    build_snapshot(database)
+    old_version = load_catalog(database).version
+
+    # Same generation, different catalog
+    replacement = str(tmp_path / 'replacement.db')
+    generate(replacement, courses=120, seed=2)
+    assert _database_generation(replacement) == _database_generation(database)
+    shutil.copyfile(replacement, database)
+
+    assert read_snapshot(snapshot_path(database), database, _database_generation(database)) is None
+    catalog = get_catalog(database)
+    assert catalog.version != old_version
+    assert len(catalog) == 120
+
+
+def test_snapshot_matches_a_copy_of_its_database(database, tmp_path):
+    build_snapshot(database)
+    copy = str(tmp_path / 'catalog.db')
+    shutil.copyfile(database, copy)
+    os.utime(copy, ns=(0, 0))
+
+    assert read_snapshot(snapshot_path(database), copy, _database_generation(copy)) is not None
@@ -0,0 +1,33 @@
+from degree_progress import DegreeProgress
+from eligibility import EligibilityEngine
+from planner import Planner
+from prereq_graph import PrerequisiteGraph
+
+
+def _progress(prerequisites, requirements):
+    courses = [{
+        'code': code,
+        'title': code,
+        'creditsUndergrad': 4,
+        'prerequisiteGroups': groups
+    } for code, groups in prerequisites.items()]
+    index = {course['code']: pos for pos, course in enumerate(courses)}
+    return DegreeProgress(courses, index, requirements, {}, EligibilityEngine(courses, index),
+                          Planner(courses, PrerequisiteGraph(courses)))
+
+
+def test_shortest_remaining_chain_counts_completed_prerequisites():
+    # MATH 121 is a placement course outside the catalog
+    progress = _progress({
+        'MATH 180': [['MATH 121']],
+        'MATH 181': [['MATH 180']],
+        'MATH 210': [['MATH 181']]
+    }, {1: [('MATH 180', 'Required'), ('MATH 181', 'Required'), ('MATH 210', 'Required')]})
+
+    audit = progress.audit(1, ['MATH 121'])
+    assert audit['remainingCourses'] == 3
+    assert audit['shortestRemainingChain'] == 3
+
+    audit = progress.audit(1, ['MATH 121', 'MATH 180'])
+    assert audit['remainingCourses'] == 2
+    assert audit['shortestRemainingChain'] == 2
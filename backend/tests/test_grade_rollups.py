@@ -0,0 +1,42 @@
+import sqlite3
+
+from grade_rollups import letter_grade_totals, refresh_grade_rollups
+
+
+def _grades_db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE grade_distributions (
+            course_code TEXT, semester_id INTEGER, instructor TEXT,
+            grade_a INTEGER, grade_b INTEGER, grade_c INTEGER, grade_d INTEGER,
+            grade_f INTEGER, grade_w INTEGER, grade_s INTEGER, grade_u INTEGER,
+            total_students INTEGER
+        )
+    ''')
+    conn.executemany('INSERT INTO grade_distributions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+        ('CS 141', 1, 'Smith', 10, 5, 2, 1, 1, 0, 0, 0, 19),
+        ('CS 141', 2, None, 4, 4, 0, 0, 0, 1, 0, 0, 9),
+        ('MATH 180', 1, 'Jones', 3, 6, 6, 2, 2, 1, 0, 0, 20)
+    ])
+    return conn
+
+
+def test_first_partial_refresh_rolls_up_every_course():
+    conn = _grades_db()
+    refresh_grade_rollups(conn, ['CS 141'])
+
+    assert letter_grade_totals(conn.cursor()) == {
+        'CS 141': (14, 9, 2, 1, 1),
+        'MATH 180': (3, 6, 6, 2, 2)
+    }
+
+
+def test_partial_refresh_updates_only_the_given_courses():
+    conn = _grades_db()
+    refresh_grade_rollups(conn)
+    conn.execute("UPDATE grade_distributions SET grade_a = 0")
+    refresh_grade_rollups(conn, ['MATH 180'])
+
+    totals = letter_grade_totals(conn.cursor())
+    assert totals['CS 141'] == (14, 9, 2, 1, 1)
+    assert totals['MATH 180'] == (0, 6, 6, 2, 2)
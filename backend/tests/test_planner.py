@@ -0,0 +1,84 @@
+from planner import Planner
+from prereq_graph import PrerequisiteGraph
+
+
+def _planner(prerequisites):
+    courses = [{
+        'code': code,
+        'title': code,
+        'creditsUndergrad': 4,
+        'prerequisiteGroups': groups
+    } for code, groups in prerequisites.items()]
+    return Planner(courses, PrerequisiteGraph(courses))
+
+
+def _scheduled(plan):
+    return [[course['code'] for course in term['courses']] for term in plan['terms']]
+
+
+def test_completed_prerequisite_outside_catalog():
+    # MATH 121 is not in the catalog, so MATH 180 is unreachable from nothing
+    planner = _planner({
+        'MATH 180': [['MATH 121']],
+        'MATH 181': [['MATH 180']]
+    })
+
+    plan = planner.plan(['MATH 121'], ['MATH 181'])
+    assert _scheduled(plan) == [['MATH 180'], ['MATH 181']]
+    assert plan['complete']
+    assert plan['criticalPathLength'] == 2
+
+    assert not planner.plan([], ['MATH 181'])['complete']
+
+
+def test_completed_course_in_a_cycle():
+    planner = _planner({
+        'CS 301': [['CS 302']],
+        'CS 302': [['CS 301']],
+        'CS 401': [['CS 302']]
+    })
+
+    plan = planner.plan(['CS 301'], ['CS 401'])
+    assert _scheduled(plan) == [['CS 302'], ['CS 401']]
+    assert plan['complete']
+
+
+def test_completed_courses_shorten_the_critical_path():
+    planner = _planner({
+        'CS 111': [],
+        'CS 141': [['CS 111']],
+        'CS 151': [['CS 111']],
+        'CS 251': [['CS 141'], ['CS 151']],
+        'CS 342': [['CS 251']]
+    })
+
+    assert planner.critical_path_length([], ['CS 342']) == 4
+    assert planner.critical_path_length(['CS 111'], ['CS 342']) == 3
+    assert planner.critical_path_length(['CS 111', 'CS 141', 'CS 151'], ['CS 342']) == 2
+    assert planner.plan(['CS 111'], ['CS 342'])['criticalPathLength'] == 3
+
+
+def test_critical_path_through_completed_prerequisite_outside_catalog():
+    planner = _planner({
+        'MATH 180': [['MATH 121']],
+        'MATH 181': [['MATH 180']],
+        'MATH 210': [['MATH 181']]
+    })
+
+    assert planner.critical_path_length([], ['MATH 210']) == 0
+    assert planner.critical_path_length(['MATH 121'], ['MATH 210']) == 3
+
+
+def test_deadline_covers_the_depth_computation():
+    planner = _planner({
+        'MATH 180': [['MATH 121']],
+        'MATH 181': [['MATH 180']]
+    })
+
+    plan = planner.plan(['MATH 121'], ['MATH 181'], deadline_seconds=-1)
+    assert plan['timedOut']
+    assert not plan['complete']
+    assert plan['terms'] == []
+    assert plan['unschedulable'] == [{'code': 'MATH 181', 'reason': 'Planning ran out of time'}]
+
+    assert planner.critical_path_length(['MATH 121'], ['MATH 181'], deadline_seconds=-1) is None
@@ -0,0 +1,79 @@
+import os
+import threading
+
+from response_cache import ResponseCache, SharedFileCache, private_directory
+
+
+def test_body_built_for_old_version_is_not_stored_under_new_version():
+    cache = ResponseCache()
+    building = threading.Event()
+    switched = threading.Event()
+
+    def build_old():
+        building.set()
+        switched.wait(5)
+        return b'OLD'
+
+    thread = threading.Thread(target=cache.get, args=('v1', 'courses', build_old))
+    thread.start()
+    building.wait(5)
+    # Another request moves the cache to the new catalog while v1 is still building
+    cache.get('v2', 'majors', lambda: b'MAJORS')
+    switched.set()
+    thread.join(5)
+
+    assert cache.get('v2', 'courses', lambda: b'NEW').body == b'NEW'
+    assert cache.stats()['bytes'] == len(b'MAJORS') + len(b'NEW')
+
+
+def test_hit_returns_stored_entry():
+    cache = ResponseCache()
+    first = cache.get('v1', 'courses', lambda: b'[]')
+    assert cache.get('v1', 'courses', lambda: b'other') is first
+    assert cache.stats()['hits'] == 1
+
+
+def test_shared_cache_scans_only_when_over_budget_or_periodically(tmp_path, monkeypatch):
+    cache = SharedFileCache(str(tmp_path), 'code', max_bytes=1000)
+    scans = []
+    files = cache._files
+    monkeypatch.setattr(cache, '_files', lambda: scans.append(1) or files())
+
+    for i in range(50):
+        assert cache.put('v1', f'key-{i}', b'x' * 10)
+    # The first write finds the size on disk; the rest only add to it
+    assert len(scans) == 1
+
+    for i in range(50):
+        cache.put('v1', f'big-{i}', b'y' * 100)
+    stats = cache.stats()
+    assert stats['bytes'] <= 1000
+    assert cache.get('v1', 'key-0') is None
+
+
+def test_shared_cache_misses_bodies_written_by_other_code(tmp_path):
+    old = SharedFileCache(str(tmp_path), 'old-code')
+    assert old.put('v1', 'courses', b'OLD')
+    assert SharedFileCache(str(tmp_path), 'old-code').get('v1', 'courses') == b'OLD'
+    assert SharedFileCache(str(tmp_path), 'new-code').get('v1', 'courses') is None
+
+
+def test_private_directory_is_created_for_this_user_only(tmp_path):
+    path = str(tmp_path / 'responses')
+    assert private_directory(path)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+    os.chmod(path, 0o777)
+    assert private_directory(path)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+
+def test_private_directory_rejects_other_owners_and_links(tmp_path, monkeypatch):
+    target = tmp_path / 'target'
+    target.mkdir()
+    link = tmp_path / 'link'
+    link.symlink_to(target)
+    assert not private_directory(str(link))
+
+    monkeypatch.setattr(os, 'getuid', lambda: os.stat(str(target)).st_uid + 1)
+    assert not private_directory(str(target))
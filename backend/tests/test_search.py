@@ -0,0 +1,24 @@
+import sqlite3
+
+from search import refresh_search_index, search_courses
+
+
+def _search_db(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE courses (course_code TEXT, title TEXT, description TEXT)')
+    conn.executemany('INSERT INTO courses VALUES (?, ?, ?)', rows)
+    refresh_search_index(conn)
+    return conn
+
+
+def test_highlights_escape_the_catalog_text():
+    conn = _search_db([
+        ('CS 100', 'Discovering <b>Computer</b> Science', 'Computing & society: <script>alert(1)</script>')
+    ])
+
+    result, = search_courses(conn, 'computer')
+    assert result['title'] == 'Discovering <b>Computer</b> Science'
+    assert result['titleHighlight'] == 'Discovering &lt;b&gt;<mark>Computer</mark>&lt;/b&gt; Science'
+    assert '<script>' not in result['snippet']
+    assert '&lt;script&gt;' in result['snippet']
+    assert '<mark>Computing</mark> &amp; society' in result['snippet']